@@ -1,31 +1,41 @@
+# Startup milestones for benchmarks/cold_start.py (no-op unless enabled)
+import startup_trace
+startup_trace.mark("interpreter")
+
+import sys
+
+# Headless runs never need Tk, so hand over before importing it
+if __name__ == "__main__" and "--headless" in sys.argv:
+    import headless_login
+    sys.exit(headless_login.main())
+
 import tkinter as tk
 from tkinter import ttk
 import customtkinter as ctk
-from PIL import Image, ImageTk, ImageOps
+from PIL import Image, ImageTk
 import json
 import os
-import keyring
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import time
-import sys
 from pathlib import Path
-import requests
 import math
 import subprocess
 import tkinter.messagebox as messagebox
-import win32gui
-import win32api
-import win32con
 import ctypes
 
+# Logins go through the shared manager, like the mini UI and the headless runner
+from login_core import LoginManager
+from background_login import BackgroundLogin
+from retry import RetryScheduler
+import profiling
+
+startup_trace.mark("imports")
+
 class ModernLoginApp(ctk.CTk):
+    @profiling.profiled
     def __init__(self, headless=False):
         if not headless:
             super().__init__()
+            startup_trace.mark("tk_init")
             
             # Determine if launched from mini UI
             self.from_mini_ui = "--from-mini" in sys.argv
@@ -65,6 +75,7 @@ class ModernLoginApp(ctk.CTk):
             
             # Load branding assets
             self.load_branding()
+            startup_trace.mark("assets")
             
             # Initialize UI
             self.setup_gui()
@@ -83,8 +94,17 @@ class ModernLoginApp(ctk.CTk):
             # Bind window closing event to our custom handler
             self.protocol("WM_DELETE_WINDOW", self.on_close)
             
+            # Login manager, which serializes logins across processes (see login_lock.py); logins run
+            # on a worker thread so waiting for another process's login doesn't freeze the window
+            self.background_login = BackgroundLogin(self, self.update_status)
+            self.login_mgr = LoginManager(ui_callback=self.background_login.status_callback)
+            
             # Load saved configuration
             self.load_config()
+            startup_trace.mark("config")
+            
+            # Record when the window is first shown
+            self.bind("<Map>", lambda event: startup_trace.mark("first_window"), add="+")
             
             # If needs_credentials flag is set, focus on username field
             if self.needs_credentials:
@@ -98,6 +118,8 @@ class ModernLoginApp(ctk.CTk):
             self.KEYRING_SERVICE = "SimulanisLogin"
             self.headless = True
             self.load_headless_config()
+            self.login_mgr = LoginManager(headless=True)
+            startup_trace.mark("config")
 
     def center_window(self):
         """Center the window on screen"""
@@ -219,12 +241,12 @@ class ModernLoginApp(ctk.CTk):
                 text_color=("gray50", "gray70")
             )
         else:
-        self.status_label = ctk.CTkLabel(
-            self.status_frame,
-            text="Ready to connect",
-            font=ctk.CTkFont(size=13),
-            text_color=("gray50", "gray70")
-        )
+            self.status_label = ctk.CTkLabel(
+                self.status_frame,
+                text="Ready to connect",
+                font=ctk.CTkFont(size=13),
+                text_color=("gray50", "gray70")
+            )
         self.status_label.grid(row=0, column=0, pady=(0, 10))
         
         # Progress bar
@@ -427,7 +449,7 @@ class ModernLoginApp(ctk.CTk):
             self.headless_config = {
                 "chrome_options": ["--headless", "--disable-gpu"],
                 "auto_login": True,
-                "retry_interval": 60,
+                "retry_interval": 10,
                 "max_retries": 3
             }
 
@@ -462,146 +484,54 @@ class ModernLoginApp(ctk.CTk):
         self.right_panel.grid()
 
     def perform_login(self):
-        """Perform the login operation"""
-        if not hasattr(self, 'headless') or not self.headless:
-            self.login_button.configure(state="disabled")
-            self.start_login_animation()
-            self.update_status(f"Initializing connection to {self.TARGET_URL}...", 10)
+        """Perform the login operation, retrying transient failures in headless mode"""
+        if hasattr(self, 'headless') and self.headless:
+            self.retry_scheduler = RetryScheduler.from_config(self.headless_config, log=self.log)
+            if not self.headless_config.get('auto_login', True):
+                self.retry_scheduler.max_retries = 0
+            return self.retry_scheduler.run(self.attempt_login)
+        return self.attempt_login()
+
+    def attempt_login(self):
+        """
+        Make a single login attempt through the shared login manager, which also
+        waits for (and reuses) a login another process is already running
+
+        With the window shown the login runs on a worker thread and its result is
+        shown by finish_login; headless, it runs right here.
+
+        Returns:
+            dict: Headless, the result of LoginManager.perform_login, with keys success, message
+                  and failure (see retry.py); None with the window shown
+        """
+        # Without credentials the manager uses the saved ones
+        if hasattr(self, 'headless') and self.headless:
+            return self.login_mgr.perform_login(None, None, None)
         
-        try:
-            # Configure Chrome options
-            chrome_options = Options()
-            if self.headless_mode_var.get():  # Use headless mode based on checkbox
-                chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            
-            if hasattr(self, 'headless') and self.headless:
-                for option in self.headless_config.get('chrome_options', []):
-                    chrome_options.add_argument(option)
-            
-            driver = webdriver.Chrome(options=chrome_options)
-            
-            self.update_status("Establishing secure connection...", 30)
-            driver.get(self.TARGET_URL)
-            
-            # Handle security warning
-            try:
-                self.update_status("Accepting security certificate...", 40)
-                advanced_button = driver.find_element(By.ID, "details-button")
-                advanced_button.click()
-                proceed_link = driver.find_element(By.ID, "proceed-link")
-                proceed_link.click()
-            except Exception as cert_error:
-                # Don't fail if certificate warning doesn't appear
-                pass
-
-            # Get username and password
-            if hasattr(self, 'headless') and self.headless:
-                username = self.get_saved_username()
-                password = self.get_saved_password()
-            else:
-                username = self.username_entry.get()
-                password = self.password_entry.get()
-                
-                if not username or not password:
-                    raise ValueError("Username and password are required")
-
-            self.update_status(f"Authenticating user {username}...", 60)
-            try:
-                wait = WebDriverWait(driver, 10)
-                username_field = wait.until(EC.presence_of_element_located((By.ID, "user")))
-            except Exception as timeout_error:
-                raise ConnectionError(f"Could not connect to {self.TARGET_URL}. Please check your network connection.")
-                
-            username_field.clear()
-            username_field.send_keys(username)
-            
-            try:
-                password_field = driver.find_element(By.ID, "passwd")
-            except Exception as field_error:
-                raise ConnectionError("Login page elements not found. The page structure might have changed.")
-                
-            password_field.clear()
-            password_field.send_keys(password)
-            
-            self.update_status("Submitting credentials...", 80)
-            submit_button = driver.find_element(By.ID, "submitbtn")
-            submit_button.click()
-            
-            # Wait for page load after submission
-            time.sleep(2)  # Give time for any redirects to happen
-            
-            # Check current URL for userSense redirect pattern
-            if "192.168.1.9/userSense" in driver.current_url:
-                # Wait to see if it redirects back to login
-                time.sleep(2)
-                if self.TARGET_URL in driver.current_url:
-                    raise ValueError("Login failed: Redirected back to login page")
-            
-            # Check for specific error messages on the page
-            try:
-                # Look for authentication failure message
-                auth_fail_msg = f"Authentication Failed for user:{username}"
-                page_source = driver.page_source
-                if auth_fail_msg in page_source:
-                    raise ValueError("Login failed: Invalid credentials")
-                
-                # Look for already logged in message
-                already_logged_msg = "User is already logged in with same ip"
-                if already_logged_msg in page_source:
-                    self.update_status("User is already logged in from this IP address")
-                    # Save config since credentials are correct
-                    if not hasattr(self, 'headless') or not self.headless:
-                        self.save_config()
-                        if self.remember_me_var.get():
-                            self.username_entry.delete(0, 'end')
-                            self.username_entry.insert(0, username)
-                    return  # Exit without raising error since this is a valid state
-                
-                # Check for successful login by verifying redirect to simulanis.com
-                if "simulanis.com" in driver.current_url:
-                    self.update_status("Successfully logged in!", 100)
-                    if not hasattr(self, 'headless') or not self.headless:
-                        self.save_config()
-                        if self.remember_me_var.get():
-                            self.username_entry.delete(0, 'end')
-                            self.username_entry.insert(0, username)
-                        # Minimize the window after successful login
-                        self.iconify()  # Minimize the main window
-                else:
-                    raise ValueError("Login failed: Please check internet connection and Credentials")
-                
-            except ValueError as ve:
-                raise ve
-            except Exception as e:
-                # If we can't find any specific messages but we're still on login page
-                if self.TARGET_URL in driver.current_url:
-                    raise ValueError("Login failed: Still on login page")
-                
-            time.sleep(2)
-            
-        except ValueError as ve:
-            self.update_status(f"Error: {str(ve)}")
-        except ConnectionError as ce:
-            self.update_status(f"Connection Error: {str(ce)}")
-        except Exception as e:
-            self.update_status(f"Connection failed: {str(e)}")
-            if hasattr(self, 'headless') and self.headless:
-                if self.headless_config.get('auto_login', True):
-                    retry_interval = self.headless_config.get('retry_interval', 60)
-                    self.log(f"Retrying connection in {retry_interval} seconds...")
-                    time.sleep(retry_interval)
-                    self.perform_login()
-        finally:
-            if not hasattr(self, 'headless') or not self.headless:
-                self.login_button.configure(state="normal")
-                self.stop_login_animation()
-            try:
-                driver.quit()
-            except:
-                pass  # Ignore errors when closing the driver
+        if self.background_login.running:
+            return None
+        username = self.username_entry.get()
+        password = self.password_entry.get()
+        if not username or not password:
+            self.update_status("Error: Username and password are required")
+            return None
+        self.login_button.configure(state="disabled")
+        self.start_login_animation()
+        self.background_login.start(self.login_mgr, self.finish_login, username, password,
+                                    self.headless_mode_var.get())
+        return None
+
+    def finish_login(self, result):
+        """Show the result of a login started by attempt_login (Tk loop)"""
+        self.login_button.configure(state="normal")
+        self.stop_login_animation()
+        
+        if result['success']:
+            # Save config since credentials are correct
+            self.save_config()
+            # Minimize the window after a new login
+            if not result.get('already_logged_in'):
+                self.iconify()
 
     def get_saved_username(self):
         """Get saved username"""
@@ -612,7 +542,10 @@ class ModernLoginApp(ctk.CTk):
         try:
             saved_username = self.get_saved_username()
             if saved_username:
-                return keyring.get_password(self.KEYRING_SERVICE, saved_username)
+                import keyring
+                password = keyring.get_password(self.KEYRING_SERVICE, saved_username)
+                startup_trace.mark("keyring")
+                return password
             return None
         except Exception as e:
             print(f"Error retrieving password: {str(e)}")
@@ -621,6 +554,7 @@ class ModernLoginApp(ctk.CTk):
     def save_credentials(self):
         """Save credentials securely"""
         try:
+            import keyring
             username = self.username_entry.get()
             if self.remember_me_var.get() and username:
                 keyring.set_password(self.KEYRING_SERVICE, username, self.password_entry.get())
@@ -854,12 +788,7 @@ class ModernLoginApp(ctk.CTk):
         self.after(500, self.destroy)
 
 if __name__ == "__main__":
-    # Check for headless mode
-    headless_mode = '--headless' in sys.argv
-    
-    app = ModernLoginApp(headless=headless_mode)
-    if not headless_mode:
-        app.mainloop()
-    else:
-        app.perform_login() 
+    # --headless was handed to headless_login.py above
+    app = ModernLoginApp()
+    app.mainloop()
 
@@ -0,0 +1,92 @@
+"""
+Simulanis Login Background Login
+
+Runs LoginManager.perform_login on a worker thread for the Tk windows. A
+login can take a while, and even longer when another process holds the
+login lock (login_lock.py), so the Tk loop must keep running meanwhile.
+
+Tk widgets may only be touched from the Tk thread: status updates the login
+reports from the worker are queued and shown by a poll on the Tk loop, the
+same way the mini UI shows its pre-flight probe, and the result is handed to
+the window from there too.
+"""
+
+import queue
+import threading
+
+from retry import FAILURE_TRANSIENT
+
+
+class BackgroundLogin:
+    """One login at a time on a worker thread, reported back on the Tk loop"""
+
+    POLL_INTERVAL_MS = 20
+
+    def __init__(self, window, on_status):
+        """
+        Initialize the runner
+
+        Args:
+            window: Tk window whose loop the results are delivered on
+            on_status (function): Shows a status update, signature: on_status(message, progress)
+        """
+        self.window = window
+        self.on_status = on_status
+        self._updates = queue.SimpleQueue()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def status_callback(self, message, progress=None):
+        """LoginManager ui_callback: show right away on the Tk thread, queue from anywhere else"""
+        if threading.current_thread() is threading.main_thread():
+            self.on_status(message, progress)
+        else:
+            self._updates.put((message, progress))
+
+    def start(self, login_mgr, on_done, username=None, password=None, headless_mode=None):
+        """
+        Start a login unless one is already running
+
+        Args:
+            login_mgr (LoginManager): Manager to log in with
+            on_done (function): Called on the Tk loop with the perform_login result
+            username (str, optional): Username, defaults to the saved one
+            password (str, optional): Password, defaults to the saved one
+            headless_mode (bool, optional): Override headless mode setting
+
+        Returns:
+            bool: False if a login was already running
+        """
+        if self.running:
+            return False
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = login_mgr.perform_login(username, password, headless_mode)
+            except Exception as e:
+                # perform_login reports its own errors; this only keeps the window from waiting forever
+                outcome['result'] = {'success': False, 'message': str(e), 'already_logged_in': False,
+                                     'failure': FAILURE_TRANSIENT}
+
+        self._thread = threading.Thread(target=run, name="background-login", daemon=True)
+        self._thread.start()
+        self.window.after(self.POLL_INTERVAL_MS, lambda: self._poll(on_done, outcome))
+        return True
+
+    def _poll(self, on_done, outcome):
+        """Show queued status updates, and the result once the worker is done (Tk loop)"""
+        while True:
+            try:
+                message, progress = self._updates.get_nowait()
+            except queue.Empty:
+                break
+            self.on_status(message, progress)
+
+        if self._thread.is_alive():
+            self.window.after(self.POLL_INTERVAL_MS, lambda: self._poll(on_done, outcome))
+            return
+        on_done(outcome['result'])
@@ -0,0 +1,91 @@
+"""
+Simulanis Login Benchmark: DevTools vs Selenium
+
+Compares the chromedriver-free DevTools backend against the Selenium backend:
+browser startup time, per-login latency and how many processes each keeps
+running. Results are printed as JSON.
+
+Usage:
+    python benchmarks/cdp_vs_selenium.py --username USER --password PASS [--url URL]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from common import make_manager
+from process_utils import tree_stats
+
+
+def measure_startup(manager, backend, runs):
+    """Start and quit a headless browser repeatedly, sampling its processes while it runs"""
+    key = tuple(manager.build_chrome_args(use_headless=True))
+    factory = manager.create_cdp_browser if backend == "cdp" else manager.create_driver
+
+    times = []
+    stats = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        browser = factory(key)
+        times.append(time.perf_counter() - started)
+        stats = tree_stats()
+        browser.quit()
+
+    return {
+        'startup_median_s': round(statistics.median(times), 4),
+        'startup_runs_s': [round(t, 4) for t in times],
+        'process_count': stats['process_count'],
+        'rss_mb': round(stats['rss_bytes'] / (1024 * 1024), 1)
+    }
+
+
+def measure_logins(manager, username, password, runs):
+    """Log in repeatedly; the first login pays for the cold start, the rest reuse the warm browser"""
+    times = []
+    round_trips = []
+    results = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = manager.perform_login(username, password, headless_mode=True)
+        times.append(time.perf_counter() - started)
+        round_trips.append(result.get('driver_round_trips'))
+        results.append(result['message'])
+
+    warm = times[1:] or times
+    return {
+        'cold_login_s': round(times[0], 4),
+        'warm_login_median_s': round(statistics.median(warm), 4),
+        'login_runs_s': [round(t, 4) for t in times],
+        'round_trips': round_trips,
+        'messages': sorted(set(results))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the DevTools backend against Selenium")
+    parser.add_argument("--username", default=os.environ.get("SIMULANIS_USERNAME"))
+    parser.add_argument("--password", default=os.environ.get("SIMULANIS_PASSWORD"))
+    parser.add_argument("--url", help="Login page URL (defaults to the portal)")
+    parser.add_argument("--chrome-binary", help="Chrome executable for the DevTools backend")
+    parser.add_argument("--startups", type=int, default=3, help="Browser starts per backend")
+    parser.add_argument("--logins", type=int, default=5, help="Logins per backend")
+    parser.add_argument("--backends", default="selenium,cdp", help="Comma separated backends to run")
+    args = parser.parse_args()
+
+    report = {}
+    for backend in args.backends.split(","):
+        manager = make_manager(backend, args.url, args.chrome_binary)
+        try:
+            report[backend] = measure_startup(manager, backend, args.startups)
+            if args.username and args.password:
+                report[backend].update(measure_logins(manager, args.username, args.password, args.logins))
+        finally:
+            manager.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Simulanis Login Benchmark: Chrome Memory
+
+Compares the "default" and "lean" browser profiles (config key
+browser_profile) by logging in against the local portal simulator with a
+cold Chrome every time, sampling the resident memory of the whole browser
+process tree (chromedriver, browser, renderers, GPU and utility processes)
+while the login runs. Reports the median and worst peak RSS, process counts and login
+latency per backend and profile as JSON.
+
+Usage:
+    python benchmarks/chrome_memory.py --runs 5
+    python benchmarks/chrome_memory.py --backends cdp --chrome-binary /usr/bin/chromium
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from common import PeakSampler, backend_unavailable, make_manager, percentile
+from portal_simulator import PortalSimulator
+
+PROFILES = ("default", "lean")
+BACKENDS = ("selenium", "cdp")
+USERNAME = "bench"
+PASSWORD = "bench"
+
+
+def run_profile(backend, profile, simulator, runs, chrome_binary=None):
+    """Log in with a fresh browser per run and summarize its memory"""
+    # No pooling, so every login pays for (and is measured with) a cold browser
+    manager = make_manager(backend, simulator.url, chrome_binary, browser_profile=profile,
+                           driver_pool_size=0, connectivity_check_url=simulator.connectivity_check_url)
+    peaks = []
+    process_counts = []
+    latencies = []
+    failures = []
+    try:
+        for _ in range(runs):
+            simulator.logout()
+            with PeakSampler(interval=0.02) as sampler:
+                started = time.perf_counter()
+                result = manager.perform_login(USERNAME, PASSWORD, headless_mode=True)
+                latencies.append(time.perf_counter() - started)
+            if not result['success']:
+                failures.append(result['message'])
+            peaks.append(sampler.peak_child_rss_bytes / (1024 * 1024))
+            process_counts.append(sampler.peak_process_count)
+    finally:
+        manager.close()
+
+    report = {
+        'runs': runs,
+        'peak_tree_rss_mb': {
+            'p50': round(percentile(peaks, 50), 1),
+            'max': round(max(peaks), 1)
+        },
+        'peak_process_count': max(process_counts),
+        'login_p50_s': round(percentile(latencies, 50), 4),
+        'failures': len(failures)
+    }
+    if failures:
+        report['failure_messages'] = sorted(set(failures))
+    return report
+
+
+def compare(default, lean):
+    """How much the lean profile saves over the default one"""
+    saved = default['peak_tree_rss_mb']['p50'] - lean['peak_tree_rss_mb']['p50']
+    return {
+        'peak_rss_saved_mb': round(saved, 1),
+        'peak_rss_saved_pct': round(100 * saved / default['peak_tree_rss_mb']['p50'], 1),
+        'processes_saved': default['peak_process_count'] - lean['peak_process_count']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Chrome memory of the default and lean profiles")
+    parser.add_argument("--runs", type=int, default=5, help="Cold logins per backend and profile")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma separated backends to run")
+    parser.add_argument("--chrome-binary", help="Chrome executable for the DevTools backend")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'backends': {}}
+    with PortalSimulator(users={USERNAME: PASSWORD}) as simulator:
+        for backend in args.backends.split(","):
+            reason = backend_unavailable(backend, args.chrome_binary)
+            if reason:
+                report['backends'][backend] = {'skipped': reason}
+                continue
+            results = {profile: run_profile(backend, profile, simulator, args.runs, args.chrome_binary)
+                       for profile in PROFILES}
+            results['lean_vs_default'] = compare(results['default'], results['lean'])
+            report['backends'][backend] = results
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Simulanis Login Benchmark: Cold Start
+
+Launches every entry point (main.py, mini_login_gui.py, auto_login_gui.py and
+simulanis_login.py) in each of its modes as a fresh process and reports how
+long it takes to reach each startup milestone recorded by startup_trace.py:
+
+    interpreter          Python is up and running the entry script
+    dispatch             simulanis_login.py parsed its arguments and picked the app to run
+    imports              Module level imports are done
+    tk_init              Tk/customtkinter root window created
+    assets               Icons and branding loaded
+    config               Configuration loaded
+    keyring              First saved password looked up
+    first_window         Window mapped on screen
+    first_login_attempt  LoginManager.perform_login (or attempt_login) entered
+    headless_result      Headless login finished
+
+Times are milliseconds since the process was launched; 'splits' holds the
+time between consecutive milestones, so it shows where the start-up goes.
+
+Each run uses a copy of the tree with a benchmark config.json (auto-login
+on, HTTP backend, pointed at the local portal simulator) and an in-memory
+keyring, so nothing on the machine is touched. GUI modes need a display;
+when DISPLAY is unset, Xvfb is started if it is installed.
+
+Usage:
+    python benchmarks/cold_start.py --runs 5 --output cold_start.json
+    python benchmarks/cold_start.py --modes "main.py --headless,mini_login_gui.py"
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import percentile
+from portal_simulator import PortalSimulator
+from process_utils import kill_process_tree, pid_exists
+from startup_trace import TRACE_ENV
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERNAME = "bench"
+PASSWORD = "bench"
+
+MARKS = ("interpreter", "imports", "tk_init", "assets", "config", "keyring",
+         "first_window", "first_login_attempt", "headless_result")
+
+# Entry point and mode -> (command line, whether it opens a window)
+MODES = {
+    "main.py": (["main.py"], True),
+    "main.py --full": (["main.py", "--full"], True),
+    "main.py --headless": (["main.py", "--headless"], False),
+    "mini_login_gui.py": (["mini_login_gui.py"], True),
+    "mini_login_gui.py --headless": (["mini_login_gui.py", "--headless"], False),
+    "auto_login_gui.py": (["auto_login_gui.py"], True),
+    "auto_login_gui.py --headless": (["auto_login_gui.py", "--headless"], False),
+    "simulanis_login.py": (["simulanis_login.py"], True),
+    "simulanis_login.py --full": (["simulanis_login.py", "--full"], True),
+    "simulanis_login.py --headless": (["simulanis_login.py", "--headless"], False),
+}
+
+# Keyring backend for the launched processes, selected through PYTHON_KEYRING_BACKEND
+KEYRING_MODULE = '''
+import os
+from keyring.backend import KeyringBackend
+
+
+class BenchKeyring(KeyringBackend):
+    priority = 1
+
+    def get_password(self, service, username):
+        return os.environ.get("SIMULANIS_BENCH_PASSWORD")
+
+    def set_password(self, service, username, password):
+        pass
+
+    def delete_password(self, service, username):
+        pass
+'''
+
+
+def start_display():
+    """
+    Start Xvfb when there is no display for the GUI modes
+
+    Returns:
+        tuple: (process or None, reason the GUI modes can't run or None)
+    """
+    if os.environ.get("DISPLAY") or sys.platform == 'win32':
+        return None, None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        return None, "no DISPLAY and Xvfb is not installed"
+
+    display = 99
+    while os.path.exists(f"/tmp/.X11-unix/X{display}"):
+        display += 1
+    process = subprocess.Popen([xvfb, f":{display}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(f"/tmp/.X11-unix/X{display}"):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            return None, "Xvfb failed to start"
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = f":{display}"
+    return process, None
+
+
+def prepare_tree(simulator):
+    """Copy the app into a temp directory with benchmark settings and keyring"""
+    work_dir = tempfile.mkdtemp(prefix="simulanis-cold-start-")
+    app_dir = os.path.join(work_dir, "app")
+    shutil.copytree(REPO_DIR, app_dir, ignore=shutil.ignore_patterns(
+        ".git", "__pycache__", "benchmarks", "*.log", "*.jsonl"))
+
+    with open(os.path.join(app_dir, "config.json"), 'w') as f:
+        json.dump({
+            'username': USERNAME,
+            'remember_me': True,
+            'auto_login': True,
+            'headless_mode': True,
+            'login_backend': "http",
+            'target_url': simulator.url,
+            'connectivity_check_url': simulator.connectivity_check_url
+        }, f)
+
+    # One attempt only, a retry would measure the backoff rather than start-up
+    headless_config_path = os.path.join(app_dir, "headless_config.json")
+    with open(headless_config_path, 'r') as f:
+        headless_config = json.load(f)
+    headless_config['max_retries'] = 0
+    with open(headless_config_path, 'w') as f:
+        json.dump(headless_config, f)
+
+    with open(os.path.join(work_dir, "bench_keyring.py"), 'w') as f:
+        f.write(KEYRING_MODULE)
+    return work_dir, app_dir
+
+
+def read_trace(path):
+    """Trace records in the order they were written"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.endswith("\n")]
+
+
+def run_once(command, gui, work_dir, app_dir, timeout):
+    """
+    Launch one entry point and wait until it reaches its last milestone
+
+    Returns:
+        dict: Milestones in ms since launch as {'marks': {...}}, plus 'error' when
+              the process exited or timed out before getting there
+    """
+    trace_path = os.path.join(work_dir, f"trace-{time.time_ns()}.jsonl")
+    env = dict(os.environ)
+    env[TRACE_ENV] = trace_path
+    env["PYTHON_KEYRING_BACKEND"] = "bench_keyring.BenchKeyring"
+    env["PYTHONPATH"] = work_dir
+    env["SIMULANIS_BENCH_PASSWORD"] = PASSWORD
+    env.pop("SIMULANIS_TARGET_URL", None)
+
+    stderr_path = trace_path[:-len(".jsonl")] + ".stderr"
+    goals = {"first_window", "first_login_attempt"} if gui else {"headless_result"}
+    launched = time.time()
+    with open(stderr_path, 'w') as stderr_file:
+        process = subprocess.Popen([sys.executable] + command, cwd=app_dir, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=stderr_file)
+    error = None
+    deadline = time.monotonic() + timeout
+    while True:
+        records = read_trace(trace_path)
+        if goals <= {record['mark'] for record in records}:
+            break
+        # A UI may hand over to another process (e.g. mini to full UI) and exit before it
+        children = {record['pid'] for record in records} - {process.pid}
+        if process.poll() is not None and not any(pid_exists(pid) for pid in children):
+            with open(stderr_path, 'r', errors='replace') as f:
+                stderr = f.read().strip().splitlines()
+            error = f"exited with code {process.returncode}" + (f": {stderr[-1]}" if stderr else "")
+            break
+        if time.monotonic() > deadline:
+            error = f"timed out after {timeout} s"
+            break
+        time.sleep(0.01)
+
+    kill_process_tree(process.pid)
+    process.wait()
+    for pid in {record['pid'] for record in read_trace(trace_path)} - {process.pid}:
+        kill_process_tree(pid)
+
+    # Marks of a process that was handed over to are superseded by the one it started
+    marks = {}
+    for record in read_trace(trace_path):
+        marks[record['mark']] = round((record['time'] - launched) * 1000, 1)
+    result = {'marks': marks}
+    missing = sorted(goals - set(marks))
+    if error or missing:
+        result['error'] = error or f"missing {', '.join(missing)}"
+    return result
+
+
+def summarize_mode(results):
+    """Median milestone times and the splits between consecutive milestones"""
+    names = [name for name in ("dispatch",) + MARKS if any(name in r['marks'] for r in results)]
+    names.sort(key=lambda name: percentile([r['marks'][name] for r in results if name in r['marks']], 50))
+
+    medians = {}
+    for name in names:
+        medians[name] = round(percentile([r['marks'][name] for r in results if name in r['marks']], 50), 1)
+
+    splits = {}
+    previous_name, previous_time = "launch", 0
+    for name in names:
+        splits[f"{previous_name}->{name}"] = round(medians[name] - previous_time, 1)
+        previous_name, previous_time = name, medians[name]
+
+    report = {'runs': len(results), 'marks_ms': medians, 'splits_ms': splits}
+    errors = sorted({r['error'] for r in results if 'error' in r})
+    if errors:
+        report['errors'] = errors
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start of every entry point")
+    parser.add_argument("--runs", type=int, default=3, help="Launches per entry point and mode")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma separated entry points/modes to run")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for a launch")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    display, display_error = start_display()
+    report = {'python': sys.version.split()[0], 'modes': {}}
+    try:
+        with PortalSimulator(users={USERNAME: PASSWORD}) as simulator:
+            work_dir, app_dir = prepare_tree(simulator)
+            try:
+                for mode in args.modes.split(","):
+                    command, gui = MODES[mode]
+                    if gui and display_error:
+                        report['modes'][mode] = {'skipped': display_error}
+                        continue
+                    results = []
+                    for _ in range(args.runs):
+                        # Every launch should log in for real, not find the session already online
+                        simulator.logout()
+                        results.append(run_once(command, gui, work_dir, app_dir, args.timeout))
+                    report['modes'][mode] = summarize_mode(results)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+    finally:
+        if display:
+            display.kill()
+            display.wait()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Shared helpers for the Simulanis Login benchmarks
+"""
+
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cdp_backend import find_chrome_binary
+from login_core import LoginManager
+from process_utils import process_rss, tree_stats
+
+
+def make_manager(backend, url=None, chrome_binary=None, quiet=True, **config):
+    """
+    Create a LoginManager forced onto one backend, with a throwaway config directory
+
+    Args:
+        backend (str): Value for login_backend ("http", "selenium" or "cdp")
+        url (str, optional): Login page URL, e.g. PortalSimulator.url
+        chrome_binary (str, optional): Chrome executable for the DevTools backend
+        quiet (bool, optional): Silence the manager's log output
+        **config: Extra config.json settings
+    """
+    config_dir = tempfile.mkdtemp(prefix="simulanis-bench-")
+    config['login_backend'] = backend
+    # Background session checks would add requests the benchmarks don't account for
+    config.setdefault('heartbeat', False)
+    if chrome_binary:
+        config['chrome_binary'] = chrome_binary
+    with open(os.path.join(config_dir, LoginManager.CONFIG_FILENAME), 'w') as f:
+        json.dump(config, f)
+
+    manager = LoginManager(config_dir=config_dir, target_url=url)
+    if quiet:
+        # Keep the benchmark output readable
+        manager.log = lambda message: None
+        manager.timing_sinks = []
+    return manager
+
+
+def backend_unavailable(backend, chrome_binary=None):
+    """Return why a backend can't run here, or None if it can"""
+    if backend == "http":
+        return None
+    try:
+        find_chrome_binary() if not chrome_binary else None
+    except FileNotFoundError as e:
+        return str(e)
+    if backend == "selenium":
+        try:
+            from selenium.webdriver.common.selenium_manager import SeleniumManager
+            SeleniumManager().binary_paths(["--browser", "chrome"])
+        except Exception as e:
+            return f"chromedriver not available: {str(e).splitlines()[0]}"
+    return None
+
+
+def percentile(values, p):
+    """Percentile with linear interpolation between the closest ranks (p in 0-100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values):
+    """p50/p95/p99 plus min and max of a list of seconds, rounded to microseconds"""
+    return {
+        'p50': round(percentile(values, 50), 6),
+        'p95': round(percentile(values, 95), 6),
+        'p99': round(percentile(values, 99), 6),
+        'min': round(min(values), 6),
+        'max': round(max(values), 6)
+    }
+
+
+class PeakSampler:
+    """Sample the resident memory and child process count of this process in the background"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_rss_bytes = 0
+        self.peak_child_rss_bytes = 0
+        self.peak_process_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        stats = tree_stats()
+        self.peak_process_count = max(self.peak_process_count, stats['process_count'])
+        self.peak_child_rss_bytes = max(self.peak_child_rss_bytes, stats['rss_bytes'])
+        self.peak_rss_bytes = max(self.peak_rss_bytes, stats['rss_bytes'] + process_rss(os.getpid()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def report(self):
+        return {
+            'peak_rss_mb': round(self.peak_rss_bytes / (1024 * 1024), 1),
+            'peak_child_rss_mb': round(self.peak_child_rss_bytes / (1024 * 1024), 1),
+            'peak_process_count': self.peak_process_count
+        }
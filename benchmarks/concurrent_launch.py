@@ -0,0 +1,128 @@
+"""
+Simulanis Login Benchmark: Concurrent Launch
+
+Checks that the mini UI's auto-login and the full UI's login, started at the
+same moment, log in to the portal only once. Both run in their own process
+against the local portal simulator and share one config directory, like two
+launchers on the same machine: the mini UI side creates its LoginManager the
+way MiniLoginApp does, the full UI side goes through
+ModernLoginApp.attempt_login. Whichever gets the lock in login_lock.py logs
+in; the other waits and reuses the result.
+
+Reports, per run, how many logins reached the portal and how many processes
+reused a shared result, and exits with status 1 if any run logged in twice.
+
+Usage:
+    python benchmarks/concurrent_launch.py --runs 10 --latency 0.2
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from common import LoginManager
+from portal_simulator import PortalSimulator
+
+USERNAME = "bench"
+PASSWORD = "bench"
+
+
+def full_ui_unavailable():
+    """Return why the full UI module can't be loaded here, or None if it can"""
+    try:
+        import auto_login_gui  # noqa: F401
+    except ImportError as e:
+        return f"full UI not available: {str(e)}"
+    return None
+
+
+def create_manager(config_dir, url, **kwargs):
+    manager = LoginManager(config_dir=config_dir, target_url=url, **kwargs)
+    manager.get_saved_password = lambda username=None: PASSWORD
+    return manager
+
+
+def run_launcher(role, config_dir, url, barrier, results):
+    """
+    One launcher process: set up like the real one, wait for the other, then log in once
+
+    Args:
+        role (str): "mini" or "full"
+        config_dir (str): Config directory shared by both launchers
+        url (str): Login page URL of the simulator
+        barrier: Releases both launchers at once
+        results: Queue receiving (role, result)
+    """
+    if role == "mini":
+        # As MiniLoginApp.__init__ creates it; its auto-login calls perform_login without credentials
+        manager = create_manager(config_dir, url, ui_callback=lambda message, progress=None: None)
+        login = lambda: manager.perform_login(None, None, True)
+    else:
+        from auto_login_gui import ModernLoginApp
+        app = ModernLoginApp(headless=True)
+        app.login_mgr.close()
+        manager = app.login_mgr = create_manager(config_dir, url, headless=True)
+        login = app.attempt_login
+
+    barrier.wait()
+    try:
+        result = login()
+    finally:
+        manager.close()
+    results.put((role, {'success': result['success'], 'message': result.get('message'),
+                        'shared': result.get('shared', False)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start the mini and full UI logins together and count portal logins")
+    parser.add_argument("--runs", type=int, default=10, help="Simultaneous launches to try")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated portal latency per request")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    reason = full_ui_unavailable()
+    if reason:
+        print(json.dumps({'skipped': reason}, indent=2))
+        return 0
+
+    report = {'python': sys.version.split()[0], 'simulated_latency_s': args.latency, 'runs': []}
+    context = multiprocessing.get_context("spawn")
+    with PortalSimulator(users={USERNAME: PASSWORD}, latency=args.latency) as simulator:
+        config_dir = tempfile.mkdtemp(prefix="simulanis-launch-")
+        with open(os.path.join(config_dir, LoginManager.CONFIG_FILENAME), 'w') as f:
+            json.dump({'username': USERNAME, 'login_backend': "http", 'heartbeat': False,
+                       'connectivity_check_url': simulator.connectivity_check_url}, f)
+
+        for _ in range(args.runs):
+            simulator.logout()
+            logins_before = simulator.stats['logins']
+            barrier = context.Barrier(2)
+            queue = context.Queue()
+            processes = [context.Process(target=run_launcher, args=(role, config_dir, simulator.url, barrier, queue))
+                         for role in ("mini", "full")]
+            for process in processes:
+                process.start()
+            # Drain the queue before joining, a launcher can't exit while its result is unread
+            results = dict(queue.get() for _ in processes)
+            for process in processes:
+                process.join()
+            report['runs'].append({
+                'portal_logins': simulator.stats['logins'] - logins_before,
+                'shared_results': sum(1 for result in results.values() if result['shared']),
+                'results': results
+            })
+
+    report['duplicate_logins'] = sum(max(run['portal_logins'] - 1, 0) for run in report['runs'])
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    return 1 if report['duplicate_logins'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
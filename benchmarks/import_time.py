@@ -0,0 +1,145 @@
+"""
+Simulanis Login Benchmark: Import Time
+
+Imports every entry point module in a fresh interpreter with -X importtime
+and checks it against a time budget, and that the heavy subsystems stay lazy:
+Selenium, requests, keyring, pystray and pywin32 must not be loaded just by
+importing a UI module, only when a login, the keyring or the tray needs them.
+
+Exits with code 1 when a module is over its budget or pulls in a lazy one,
+so an innocent looking top-level import doesn't slow down the first window.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --output import_time.json
+    python benchmarks/import_time.py --baseline import_time.json --margin 0.2
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from common import percentile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median cumulative import time allowed per module in milliseconds. The UI
+# modules are mostly Tk, customtkinter and PIL, which the first window needs.
+BUDGETS_MS = {
+    "simulanis_login": 30,
+    "login_core": 120,
+    "mini_login_gui": 400,
+    "main": 400,
+    "auto_login_gui": 400,
+}
+
+# Top-level packages that must only be imported on first use
+LAZY_MODULES = ("selenium", "requests", "keyring", "pystray", "win32gui", "win32api", "win32con")
+
+TOP_IMPORTS = 5
+
+
+def measure(module):
+    """
+    Import a module in a fresh interpreter
+
+    Returns:
+        dict: total_ms (cumulative import time), imported (set of module names),
+              self_ms ({module: self time}) or error (str) if the import failed
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             cwd=REPO_DIR, capture_output=True, text=True)
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        return {'error': lines[-1] if lines else f"exit code {process.returncode}"}
+
+    # Lines look like "import time:   self [us] | cumulative | imported package", nested
+    # imports are indented and listed before the module that imported them
+    total_ms = None
+    self_ms = {}
+    pending = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        pending[name.strip()] = int(own) / 1000
+        if name.startswith(" ") and not name.startswith("  "):
+            # Top level import, anything before it belongs to it (site imports come first)
+            if name.strip() == module:
+                total_ms = int(cumulative) / 1000
+                self_ms = pending
+            pending = {}
+    return {'total_ms': total_ms, 'self_ms': self_ms, 'imported': set(self_ms)}
+
+
+def check_module(module, runs):
+    """Measure a module in several fresh interpreters and summarize the imports"""
+    measure(module)  # Warm the bytecode cache
+    samples = [measure(module) for _ in range(runs)]
+    if 'error' in samples[0]:
+        return {'error': samples[0]['error']}
+
+    totals = [sample['total_ms'] for sample in samples]
+    slowest = sorted(samples[0]['self_ms'].items(), key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+    report = {
+        'p50_ms': round(percentile(totals, 50), 1),
+        'min_ms': round(min(totals), 1),
+        'budget_ms': BUDGETS_MS.get(module),
+        'modules_imported': len(samples[0]['imported']),
+        'slowest_self_ms': {name: round(ms, 1) for name, ms in slowest},
+        'eager_lazy_modules': sorted(name for name in LAZY_MODULES if name in samples[0]['imported'])
+    }
+    return report
+
+
+def find_problems(report, baseline=None, margin=0.2):
+    """Budget overruns, eagerly loaded lazy modules and baseline regressions, human readable"""
+    problems = []
+    for module, current in report['modules'].items():
+        if 'error' in current:
+            continue
+        if current['budget_ms'] is not None and current['p50_ms'] > current['budget_ms']:
+            problems.append(f"{module} imports in {current['p50_ms']} ms, budget is {current['budget_ms']} ms")
+        if current['eager_lazy_modules']:
+            problems.append(f"{module} imports {', '.join(current['eager_lazy_modules'])} at module level")
+        previous = (baseline or {}).get('modules', {}).get(module)
+        if previous and 'p50_ms' in previous and current['p50_ms'] > previous['p50_ms'] * (1 + margin):
+            problems.append(f"{module} p50 {current['p50_ms']} ms exceeds baseline "
+                            f"{previous['p50_ms']} ms + {margin:.0%}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of every entry point module")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--modules", default=",".join(BUDGETS_MS), help="Comma separated modules to check")
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Also fail if this stored report is exceeded")
+    parser.add_argument("--margin", type=float, default=0.2, help="Allowed slowdown over the baseline")
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'modules': {}}
+    for module in args.modules.split(","):
+        report['modules'][module] = check_module(module, args.runs)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    problems = find_problems(report, baseline, args.margin)
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}", file=sys.stderr)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Simulanis Login Benchmark: Login Latency
+
+Runs N logins through every available LoginManager backend against the local
+portal simulator and reports end-to-end p50/p95/p99 latency, the per-phase
+breakdown, peak RSS and peak process count as JSON.
+
+With --baseline the run fails (exit code 1) when a backend's p50 or p95 is
+more than --margin above the stored baseline, so a slower perform_login or
+Chrome option list is caught before it ships.
+
+Usage:
+    python benchmarks/login_latency.py --runs 50 --output latest.json
+    python benchmarks/login_latency.py --save-baseline benchmarks/baseline.json
+    python benchmarks/login_latency.py --baseline benchmarks/baseline.json --margin 0.2
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from common import PeakSampler, backend_unavailable, make_manager, percentile, summarize
+from portal_simulator import PortalSimulator
+
+BACKENDS = ("http", "selenium", "cdp")
+USERNAME = "bench"
+PASSWORD = "bench"
+
+
+def run_backend(backend, simulator, runs, warmup, chrome_binary=None):
+    """Log in repeatedly through one backend and summarize the results"""
+    manager = make_manager(backend, simulator.url, chrome_binary,
+                           connectivity_check_url=simulator.connectivity_check_url)
+    latencies = []
+    phases = {}
+    round_trips = []
+    failures = []
+    try:
+        with PeakSampler() as sampler:
+            for i in range(warmup + runs):
+                # Every login should be a real one, not "already online"
+                simulator.logout()
+                started = time.perf_counter()
+                result = manager.perform_login(USERNAME, PASSWORD, headless_mode=True)
+                elapsed = time.perf_counter() - started
+
+                if not result['success']:
+                    failures.append(result['message'])
+                if i < warmup:
+                    continue
+                latencies.append(elapsed)
+                for phase, seconds in result.get('timings', {}).items():
+                    if phase != 'total':
+                        phases.setdefault(phase, []).append(seconds)
+                if 'driver_round_trips' in result:
+                    round_trips.append(result['driver_round_trips'])
+    finally:
+        manager.close()
+
+    report = {
+        'runs': runs,
+        'latency_s': summarize(latencies),
+        'phases_s': {phase: {'p50': round(percentile(v, 50), 6), 'p95': round(percentile(v, 95), 6)}
+                     for phase, v in phases.items()},
+        'failures': len(failures)
+    }
+    if failures:
+        report['failure_messages'] = sorted(set(failures))
+    if round_trips:
+        report['driver_round_trips_p50'] = percentile(round_trips, 50)
+    report.update(sampler.report())
+    return report
+
+
+def check_baseline(report, baseline, margin):
+    """
+    Compare a report against a stored baseline
+
+    Returns:
+        list: Human readable regressions, empty if everything is within the margin
+    """
+    regressions = []
+    for backend, current in report['backends'].items():
+        previous = baseline.get('backends', {}).get(backend)
+        if not previous or 'latency_s' not in current or 'latency_s' not in previous:
+            continue
+        for stat in ('p50', 'p95'):
+            limit = previous['latency_s'][stat] * (1 + margin)
+            if current['latency_s'][stat] > limit:
+                regressions.append(
+                    f"{backend} {stat} {current['latency_s'][stat] * 1000:.1f} ms exceeds baseline "
+                    f"{previous['latency_s'][stat] * 1000:.1f} ms + {margin:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login latency against the portal simulator")
+    parser.add_argument("--runs", type=int, default=20, help="Measured logins per backend")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured logins per backend first")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma separated backends to run")
+    parser.add_argument("--latency", type=float, default=0, help="Simulated portal latency per request")
+    parser.add_argument("--chrome-binary", help="Chrome executable for the DevTools backend")
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Fail if this stored report is exceeded")
+    parser.add_argument("--margin", type=float, default=0.2, help="Allowed slowdown over the baseline")
+    parser.add_argument("--save-baseline", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'simulated_latency_s': args.latency, 'backends': {}}
+    with PortalSimulator(users={USERNAME: PASSWORD}, latency=args.latency) as simulator:
+        for backend in args.backends.split(","):
+            reason = backend_unavailable(backend, args.chrome_binary)
+            if reason:
+                report['backends'][backend] = {'skipped': reason}
+                continue
+            report['backends'][backend] = run_backend(backend, simulator, args.runs, args.warmup,
+                                                      args.chrome_binary)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = check_baseline(report, json.load(f), args.margin)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
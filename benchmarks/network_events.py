@@ -0,0 +1,126 @@
+"""
+Simulanis Login Benchmark: Network Events
+
+Measures how quickly the login daemon reacts to network changes. A
+FakeEventSource stands in for the kernel's netlink notifications and the
+daemon logs in against the local portal simulator, with the periodic check
+interval set so long that only events can trigger a login.
+
+Reports, per scenario, the time from the event to the start of the login and
+to the session being up, plus how many portal requests were made while no
+link was up (should be zero: the daemon suspends itself).
+
+Usage:
+    python benchmarks/network_events.py --runs 20
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+from common import make_manager, summarize
+from login_daemon import LoginDaemon
+from netlink_events import FakeEventSource
+from portal_simulator import PortalSimulator
+
+USERNAME = "bench"
+PASSWORD = "bench"
+# Long enough that every login in the benchmark is caused by an event
+CHECK_INTERVAL = 3600
+LOGIN_TIMEOUT = 10
+
+
+class LoginWatcher:
+    """Wraps perform_login to timestamp when logins start and finish"""
+
+    def __init__(self, manager):
+        self.started = []
+        self.finished = threading.Event()
+        self.results = []
+        perform_login = manager.perform_login
+
+        def watched(*args, **kwargs):
+            self.started.append(time.perf_counter())
+            result = perform_login(*args, **kwargs)
+            self.results.append((time.perf_counter(), result))
+            if result.get('success'):
+                self.finished.set()
+            return result
+        manager.perform_login = watched
+
+    def measure(self, trigger):
+        """Fire an event and return (seconds to login start, seconds to session up)"""
+        self.finished.clear()
+        logins_before = len(self.started)
+        fired = time.perf_counter()
+        trigger()
+        if not self.finished.wait(LOGIN_TIMEOUT):
+            raise RuntimeError("No successful login after the event")
+        return self.started[logins_before] - fired, self.results[-1][0] - fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the login daemon's reaction to network events")
+    parser.add_argument("--runs", type=int, default=20, help="Events per scenario")
+    parser.add_argument("--latency", type=float, default=0, help="Simulated portal latency per request")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'simulated_latency_s': args.latency, 'runs': args.runs}
+    with PortalSimulator(users={USERNAME: PASSWORD}, latency=args.latency) as simulator:
+        manager = make_manager("http", simulator.url, connectivity_check_url=simulator.connectivity_check_url)
+        manager.get_saved_username = lambda: USERNAME
+        manager.get_saved_password = lambda username=None: PASSWORD
+        watcher = LoginWatcher(manager)
+
+        source = FakeEventSource(link_up=False)
+        daemon = LoginDaemon(manager, check_interval=CHECK_INTERVAL, event_source=source)
+        thread = threading.Thread(target=daemon.run, daemon=True)
+        thread.start()
+
+        try:
+            # Nothing may reach the portal while there is no link
+            time.sleep(0.5)
+            requests_while_down = simulator.stats['requests']
+
+            plug = {'to_login_start_s': [], 'to_online_s': []}
+            for _ in range(args.runs):
+                simulator.logout()
+                to_start, to_online = watcher.measure(source.plug)
+                plug['to_login_start_s'].append(to_start)
+                plug['to_online_s'].append(to_online)
+
+                requests_before = simulator.stats['requests']
+                source.unplug()
+                simulator.logout()
+                time.sleep(0.05)
+                requests_while_down += simulator.stats['requests'] - requests_before
+
+            # DHCP renewal with the link up, after the portal dropped the session
+            source.plug()
+            time.sleep(0.05)
+            renewal = {'to_login_start_s': [], 'to_online_s': []}
+            for _ in range(args.runs):
+                simulator.logout()
+                to_start, to_online = watcher.measure(source.new_address)
+                renewal['to_login_start_s'].append(to_start)
+                renewal['to_online_s'].append(to_online)
+        finally:
+            daemon.stop()
+            thread.join()
+
+    report['link_up'] = {name: summarize(values) for name, values in plug.items()}
+    report['address_added'] = {name: summarize(values) for name, values in renewal.items()}
+    report['portal_requests_while_link_down'] = requests_while_down
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
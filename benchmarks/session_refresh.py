@@ -0,0 +1,130 @@
+"""
+Simulanis Login Benchmark: Session Refresh
+
+Measures how long the user is cut off when the portal ends a session. The
+portal simulator expires every login after --ttl seconds; the login daemon
+keeps the session up with the heartbeat running, once with predictive
+re-login switched off and once with it on. A probe thread requests the
+connectivity check every few milliseconds, the way a user's traffic would,
+and adds up the time it was intercepted by the portal.
+
+The first sessions of the predictive run only teach the manager the
+session lifetime, so the report covers the sessions after those.
+
+Usage:
+    python benchmarks/session_refresh.py --ttl 3 --sessions 8
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+import requests
+import urllib3
+
+from common import make_manager, summarize
+from login_daemon import LoginDaemon
+from portal_simulator import PortalSimulator
+from session_lifetime import MIN_OBSERVATIONS
+
+USERNAME = "bench"
+PASSWORD = "bench"
+PROBE_INTERVAL = 0.01
+# Only the heartbeat may notice an expiry, not the daemon's interval check
+CHECK_INTERVAL = 3600
+
+
+class OutageProbe:
+    """Polls the connectivity check and records each stretch of being intercepted"""
+
+    def __init__(self, url):
+        self.url = url
+        self.outages = []
+        self._session = requests.Session()
+        self._session.trust_env = False
+        # The simulator serves a self-signed certificate
+        self._session.verify = False
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        down_since = None
+        while not self._stopped.is_set():
+            try:
+                online = self._session.get(self.url, timeout=1, allow_redirects=False).status_code == 204
+            except requests.RequestException:
+                online = False
+            now = time.perf_counter()
+            if not online and down_since is None:
+                down_since = now
+            elif online and down_since is not None:
+                self.outages.append(now - down_since)
+                down_since = None
+            time.sleep(PROBE_INTERVAL)
+
+
+def run_scenario(ttl, sessions, predictive, heartbeat_max):
+    """Keep the session up through the given number of expiries, returning the outages seen"""
+    with PortalSimulator(users={USERNAME: PASSWORD}, session_ttl=ttl) as simulator:
+        manager = make_manager("http", simulator.url, connectivity_check_url=simulator.connectivity_check_url,
+                               heartbeat=True, heartbeat_min_interval=0.25, heartbeat_max_interval=heartbeat_max,
+                               predictive_reauth=predictive, reauth_watch_interval=0.05)
+        manager.get_saved_username = lambda: USERNAME
+        manager.get_saved_password = lambda username=None: PASSWORD
+
+        daemon = LoginDaemon(manager, check_interval=CHECK_INTERVAL)
+        thread = threading.Thread(target=daemon.run, daemon=True)
+        probe = OutageProbe(simulator.connectivity_check_url)
+        thread.start()
+        try:
+            # Start counting once the first login is through
+            while not manager.is_connected:
+                time.sleep(0.01)
+            probe.start()
+            time.sleep(ttl * sessions)
+            probe.stop()
+        finally:
+            daemon.stop()
+            thread.join()
+        return probe.outages, simulator.stats['logins']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure outages at session expiry with and without predictive re-login")
+    parser.add_argument("--ttl", type=float, default=3, help="Seconds the simulated portal keeps a session")
+    parser.add_argument("--sessions", type=int, default=8, help="Session lifetimes to run each scenario for")
+    parser.add_argument("--heartbeat-max", type=float, default=2, help="Longest heartbeat interval")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'session_ttl_s': args.ttl, 'sessions': args.sessions}
+    for name, predictive in (('reactive', False), ('predictive', True)):
+        outages, logins = run_scenario(args.ttl, args.sessions, predictive, args.heartbeat_max)
+        # Both runs skip the sessions the predictive one spends learning
+        learned = outages[MIN_OBSERVATIONS:]
+        report[name] = {
+            'logins': logins,
+            'outages': len(outages),
+            'outage_s': summarize(learned) if learned else None,
+            'total_outage_s': round(sum(learned), 3)
+        }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
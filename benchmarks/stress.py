@@ -0,0 +1,230 @@
+"""
+Simulanis Login Benchmark: Concurrency Stress
+
+Runs N concurrent LoginManager.perform_login calls against the local portal
+simulator, for increasing N, to find how much parallelism one login host can
+sustain. Every worker has its own LoginManager and config directory, like a
+separate machine would, and logs in as its own user (the simulator keeps one
+session per username here, since all workers share 127.0.0.1).
+
+Per level the report has throughput, the latency distribution, what the
+failures were (timeouts per phase, connection errors, exceptions), peak open
+file descriptors, peak Chrome process count and peak memory. Escalation
+stops once the failure rate goes over --max-failure-rate.
+
+Usage:
+    python benchmarks/stress.py --levels 1,2,4,8,16,32 --logins 3
+    python benchmarks/stress.py --mode processes --backend cdp --levels 1,2,4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from queue import SimpleQueue
+
+from common import PeakSampler, backend_unavailable, make_manager, summarize
+from portal_simulator import PortalSimulator
+from process_utils import open_fd_count, process_name, process_tree
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PASSWORD = "bench"
+CHROME_PROCESS_NAMES = ("chrome", "chromium", "chromedriver")
+
+
+class StressSampler(PeakSampler):
+    """PeakSampler that also tracks open file descriptors and Chrome processes"""
+
+    def __init__(self, interval=0.05):
+        super().__init__(interval)
+        self.peak_fd_count = 0
+        self.peak_chrome_count = 0
+
+    def sample(self):
+        super().sample()
+        pids = process_tree(os.getpid())
+        self.peak_fd_count = max(self.peak_fd_count, sum(open_fd_count(pid) for pid in pids))
+        chrome = [pid for pid in pids if process_name(pid).lower().startswith(CHROME_PROCESS_NAMES)]
+        self.peak_chrome_count = max(self.peak_chrome_count, len(chrome))
+
+    def report(self):
+        report = super().report()
+        report['peak_open_fds'] = self.peak_fd_count
+        report['peak_chrome_processes'] = self.peak_chrome_count
+        return report
+
+
+def failure_mode(result):
+    """Short, groupable description of why a login failed (None if it succeeded)"""
+    if result.get('success'):
+        return None
+    if result.get('timed_out_phase'):
+        return f"timeout in {result['timed_out_phase']}"
+    # Messages can carry addresses and errno details, the start is enough to group them
+    return f"{result.get('failure', 'unknown')}: {result.get('message', '')[:80]}"
+
+
+def run_worker(worker, settings, barrier, results):
+    """
+    One simulated machine: create a LoginManager, wait for the others, then log in repeatedly
+
+    Args:
+        worker (int): Worker number, used for the usernames
+        settings (dict): backend, url, connectivity_check_url, chrome_binary and logins
+        barrier: Releases all workers at once
+        results: Queue receiving one dict per worker
+    """
+    outcomes = []
+    started = finished = None
+    try:
+        manager = make_manager(settings['backend'], settings['url'], settings['chrome_binary'],
+                               connectivity_check_url=settings['connectivity_check_url'])
+    except Exception as e:
+        manager = None
+        outcomes.append({'latency': None, 'failure': f"setup: {type(e).__name__}: {str(e)[:80]}"})
+
+    try:
+        barrier.wait()
+        started = time.time()
+        for login in range(settings['logins'] if manager else 0):
+            begun = time.perf_counter()
+            try:
+                result = manager.perform_login(f"user{worker}-{login}", PASSWORD, headless_mode=True)
+                failure = failure_mode(result)
+            except Exception as e:
+                # perform_login reports its own errors, but exhausted resources can break anything
+                failure = f"exception: {type(e).__name__}: {str(e)[:80]}"
+            outcomes.append({'latency': time.perf_counter() - begun, 'failure': failure})
+        finished = time.time()
+    finally:
+        if manager:
+            manager.close()
+        results.put({'outcomes': outcomes, 'started': started, 'finished': finished})
+
+
+def run_level(workers, settings, mode):
+    """Run one concurrency level and return the per-worker results plus resource peaks"""
+    with StressSampler() as sampler:
+        if mode == "processes":
+            context = multiprocessing.get_context("spawn")
+            barrier = context.Barrier(workers)
+            queue = context.Queue()
+            processes = [context.Process(target=run_worker, args=(w, settings, barrier, queue))
+                         for w in range(workers)]
+            for process in processes:
+                process.start()
+            # Drain the queue before joining, a worker can't exit while its result is unread
+            results = [queue.get() for _ in processes]
+            for process in processes:
+                process.join()
+        else:
+            barrier = threading.Barrier(workers)
+            queue = SimpleQueue()
+            threads = [threading.Thread(target=run_worker, args=(w, settings, barrier, queue))
+                       for w in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results = [queue.get() for _ in threads]
+    return results, sampler.report()
+
+
+def summarize_level(workers, results, peaks, portal_requests):
+    """Throughput, latencies and failure modes of one level"""
+    outcomes = [outcome for result in results for outcome in result['outcomes']]
+    succeeded = [o['latency'] for o in outcomes if o['failure'] is None]
+    starts = [r['started'] for r in results if r['started']]
+    ends = [r['finished'] for r in results if r['finished']]
+    wall = max(ends) - min(starts) if starts and ends else None
+
+    report = {
+        'workers': workers,
+        'logins': len(outcomes),
+        'succeeded': len(succeeded),
+        'failure_rate': round(1 - len(succeeded) / len(outcomes), 3) if outcomes else 1,
+        'wall_s': round(wall, 3) if wall else None,
+        'throughput_per_s': round(len(succeeded) / wall, 2) if wall else None,
+        'portal_requests': portal_requests
+    }
+    if succeeded:
+        report['latency_s'] = summarize(succeeded)
+    failures = Counter(o['failure'] for o in outcomes if o['failure'] is not None)
+    if failures:
+        report['failure_modes'] = dict(failures.most_common())
+    report.update(peaks)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress many concurrent logins against the portal simulator")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="Comma separated numbers of concurrent workers")
+    parser.add_argument("--logins", type=int, default=3, help="Logins per worker and level")
+    parser.add_argument("--mode", choices=("threads", "processes"), default="threads",
+                        help="Run workers as threads in this process or as separate processes")
+    parser.add_argument("--backend", default="http", help="Login backend: http, selenium or cdp")
+    parser.add_argument("--chrome-binary", help="Chrome executable for the DevTools backend")
+    parser.add_argument("--latency", type=float, default=0, help="Simulated portal latency per request")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of portal requests answered with 503")
+    parser.add_argument("--max-failure-rate", type=float, default=0.5, help="Stop escalating above this")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    report = {
+        'python': sys.version.split()[0],
+        'mode': args.mode,
+        'backend': args.backend,
+        'logins_per_worker': args.logins,
+        'simulated_latency_s': args.latency,
+        'levels': []
+    }
+    if resource is not None:
+        report['fd_limit'] = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+    reason = backend_unavailable(args.backend, args.chrome_binary)
+    if reason:
+        report['skipped'] = reason
+        print(json.dumps(report, indent=2))
+        return
+
+    users = {f"user{w}-{login}": PASSWORD for w in range(max(levels)) for login in range(args.logins)}
+    with PortalSimulator(users=users, latency=args.latency, error_rate=args.error_rate,
+                         session_key="user") as simulator:
+        settings = {
+            'backend': args.backend,
+            'url': simulator.url,
+            'connectivity_check_url': simulator.connectivity_check_url,
+            'chrome_binary': args.chrome_binary,
+            'logins': args.logins
+        }
+        for workers in levels:
+            # Every level logs the same users in again
+            simulator.logout()
+            requests_before = simulator.stats['requests']
+            results, peaks = run_level(workers, settings, args.mode)
+            level = summarize_level(workers, results, peaks, simulator.stats['requests'] - requests_before)
+            report['levels'].append(level)
+            print(f"{workers} workers: {level['succeeded']}/{level['logins']} logins, "
+                  f"{level['throughput_per_s']} per second", file=sys.stderr)
+            if level['failure_rate'] > args.max_failure_rate:
+                report['stopped'] = f"failure rate {level['failure_rate']:.0%} at {workers} workers"
+                break
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
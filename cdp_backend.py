@@ -0,0 +1,498 @@
+"""
+Simulanis Login CDP Backend
+
+This module drives Chrome directly over the DevTools protocol, without the
+chromedriver process and its extra HTTP hop. On POSIX systems Chrome is
+started with --remote-debugging-pipe; elsewhere it falls back to a local
+debugging port and a minimal WebSocket client.
+"""
+
+import base64
+import json
+import os
+import select
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+
+class CdpError(Exception):
+    """Raised when Chrome reports an error for a DevTools command"""
+
+
+def find_chrome_binary():
+    """
+    Locate a Chrome or Chromium executable
+
+    Returns:
+        str: Path to the browser executable
+
+    Raises:
+        FileNotFoundError: If no browser can be found
+    """
+    candidates = []
+    if sys.platform == 'win32':
+        for base in (os.environ.get('PROGRAMFILES'), os.environ.get('PROGRAMFILES(X86)'), os.environ.get('LOCALAPPDATA')):
+            if base:
+                candidates.append(os.path.join(base, "Google", "Chrome", "Application", "chrome.exe"))
+    elif sys.platform == 'darwin':
+        candidates.append("/Applications/Google Chrome.app/Contents/MacOS/Google Chrome")
+
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        path = shutil.which(name)
+        if path:
+            candidates.append(path)
+
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError("Chrome executable not found")
+
+
+class SpawnedProcess:
+    """Minimal Popen-like handle for a process started with os.posix_spawn"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None:
+            pid, status = os.waitpid(self.pid, os.WNOHANG)
+            if pid:
+                self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(str(self.pid), timeout)
+            time.sleep(0.05)
+        return self.returncode
+
+    def kill(self):
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class PipeTransport:
+    """DevTools messages over the file descriptors 3 and 4 Chrome reads and writes with --remote-debugging-pipe"""
+
+    def __init__(self):
+        import fcntl
+
+        child_read, self._write_fd = os.pipe()
+        self._read_fd, child_write = os.pipe()
+
+        # Park the child's ends above 3 and 4 so the dup2 in the child can't clobber them
+        self._child_fds = (
+            fcntl.fcntl(child_read, fcntl.F_DUPFD_CLOEXEC, 10),
+            fcntl.fcntl(child_write, fcntl.F_DUPFD_CLOEXEC, 10)
+        )
+        os.close(child_read)
+        os.close(child_write)
+        self._buffer = b""
+
+    def chrome_args(self):
+        return ["--remote-debugging-pipe"]
+
+    def spawn(self, args):
+        """Start Chrome with our pipe ends as its descriptors 3 and 4"""
+        child_read, child_write = self._child_fds
+        file_actions = [
+            (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+            (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+            (os.POSIX_SPAWN_DUP2, child_read, 3),
+            (os.POSIX_SPAWN_DUP2, child_write, 4)
+        ]
+        pid = os.posix_spawn(args[0], args, os.environ, file_actions=file_actions)
+        return SpawnedProcess(pid)
+
+    def connect(self, process, user_data_dir, timeout):
+        # Chrome has its own copies now
+        for fd in self._child_fds:
+            os.close(fd)
+        self._child_fds = ()
+
+    def send(self, message):
+        data = message.encode('utf-8') + b"\0"
+        while data:
+            written = os.write(self._write_fd, data)
+            data = data[written:]
+
+    def receive(self, timeout):
+        """Return the next message, or None if nothing arrives within the timeout"""
+        deadline = time.monotonic() + timeout
+        while b"\0" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([self._read_fd], [], [], remaining)
+            if not ready:
+                return None
+            chunk = os.read(self._read_fd, 65536)
+            if not chunk:
+                raise ConnectionError("Chrome closed the DevTools pipe")
+            self._buffer += chunk
+
+        message, self._buffer = self._buffer.split(b"\0", 1)
+        return message.decode('utf-8')
+
+    def close(self):
+        for fd in (self._read_fd, self._write_fd) + tuple(self._child_fds):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._child_fds = ()
+
+
+class WebSocketTransport:
+    """DevTools messages over the local debugging port, using a minimal WebSocket client"""
+
+    def __init__(self):
+        self.sock = None
+        self._buffer = b""
+
+    def chrome_args(self):
+        return ["--remote-debugging-port=0"]
+
+    def spawn(self, args):
+        return subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def connect(self, process, user_data_dir, timeout):
+        """Read the port Chrome picked from DevToolsActivePort and open the browser WebSocket"""
+        deadline = time.monotonic() + timeout
+        port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+        lines = []
+        while len(lines) < 2:
+            if process.poll() is not None:
+                raise ConnectionError("Chrome exited before opening its debugging port")
+            if time.monotonic() >= deadline:
+                raise TimeoutError("Chrome did not open its debugging port")
+            try:
+                with open(port_file, 'r') as f:
+                    lines = f.read().split()
+            except OSError:
+                pass
+            if len(lines) < 2:
+                time.sleep(0.05)
+
+        port, path = int(lines[0]), lines[1]
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: 127.0.0.1:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        self.sock.sendall(request.encode('ascii'))
+
+        response = b""
+        while b"\r\n\r\n" not in response:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("Chrome closed the debugging connection")
+            response += chunk
+        headers, self._buffer = response.split(b"\r\n\r\n", 1)
+        if b" 101 " not in headers.split(b"\r\n", 1)[0]:
+            raise ConnectionError("Chrome refused the DevTools WebSocket")
+
+    def send(self, message, opcode=0x1):
+        payload = message.encode('utf-8') if isinstance(message, str) else message
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        # Client frames must be masked
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 65536:
+            header += bytes([0x80 | 126]) + struct.pack("!H", length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack("!Q", length)
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.sock.sendall(header + mask + masked)
+
+    def receive(self, timeout):
+        """Return the next text message, or None if nothing arrives within the timeout"""
+        deadline = time.monotonic() + timeout
+        fragments = []
+        while True:
+            header = self._read_exact(2, deadline)
+            if header is None:
+                return None
+            opcode = header[0] & 0x0F
+            length = header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", self._read_exact(2, None))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", self._read_exact(8, None))[0]
+            payload = self._read_exact(length, None) if length else b""
+
+            if opcode == 0x8:
+                raise ConnectionError("Chrome closed the DevTools WebSocket")
+            if opcode == 0x9:
+                self.send(payload, opcode=0xA)
+                continue
+            if opcode in (0x0, 0x1, 0x2):
+                fragments.append(payload)
+                if header[0] & 0x80:
+                    return b"".join(fragments).decode('utf-8')
+
+    def _read_exact(self, count, deadline):
+        """Read count bytes; returns None only if nothing at all arrived before the deadline"""
+        while len(self._buffer) < count:
+            if deadline is not None and not self._buffer:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.sock.settimeout(remaining)
+            else:
+                # Once a frame has started, wait for the rest of it
+                self.sock.settimeout(10)
+            try:
+                chunk = self.sock.recv(65536)
+            except socket.timeout:
+                if not self._buffer:
+                    return None
+                raise
+            if not chunk:
+                raise ConnectionError("Chrome closed the DevTools WebSocket")
+            self._buffer += chunk
+
+        data, self._buffer = self._buffer[:count], self._buffer[count:]
+        return data
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+
+class CdpConnection:
+    """Synchronous DevTools command/response handling on top of a transport"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.commands_sent = 0
+        self._next_id = 0
+        self._events = []
+
+    def send(self, method, params=None, session_id=None, timeout=10):
+        """
+        Send a command and wait for its result
+
+        Returns:
+            dict: The command's result
+
+        Raises:
+            CdpError: If Chrome answers with an error
+            TimeoutError: If no answer arrives within the timeout
+        """
+        self._next_id += 1
+        command_id = self._next_id
+        message = {'id': command_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        self.transport.send(json.dumps(message))
+        self.commands_sent += 1
+
+        deadline = time.monotonic() + timeout
+        while True:
+            reply = self._receive(deadline, method)
+            if reply.get('id') == command_id:
+                if 'error' in reply:
+                    raise CdpError(f"{method}: {reply['error'].get('message', 'unknown error')}")
+                return reply.get('result', {})
+            if 'method' in reply:
+                self._events.append(reply)
+
+    def wait_for_event(self, method, session_id=None, timeout=10):
+        """Wait for an event, returning its params"""
+        deadline = time.monotonic() + timeout
+        while True:
+            for event in self._events:
+                if event['method'] == method and event.get('sessionId') == session_id:
+                    self._events.remove(event)
+                    return event.get('params', {})
+            event = self._receive(deadline, method)
+            if 'method' in event:
+                self._events.append(event)
+
+    def discard_events(self, session_id):
+        """Forget queued events of a closed session"""
+        self._events = [e for e in self._events if e.get('sessionId') != session_id]
+
+    def _receive(self, deadline, waiting_for):
+        remaining = deadline - time.monotonic()
+        raw = self.transport.receive(max(remaining, 0))
+        if raw is None:
+            raise TimeoutError(f"Timed out waiting for {waiting_for}")
+        return json.loads(raw)
+
+
+class CdpPage:
+    """One browser tab attached through a flattened DevTools session"""
+
+    def __init__(self, connection, target_id, session_id):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+
+    def send(self, method, params=None, timeout=10):
+        return self.connection.send(method, params, session_id=self.session_id, timeout=timeout)
+
+    def navigate(self, url, timeout=10):
+        """
+        Load a URL and wait for its load event
+
+        Raises:
+            ConnectionError: If Chrome reports a navigation error
+        """
+        result = self.send("Page.navigate", {'url': url}, timeout=timeout)
+        if result.get('errorText'):
+            raise ConnectionError(f"Could not connect to login page: {result['errorText']}")
+        self.wait_for_load(timeout)
+
+    def wait_for_load(self, timeout=10):
+        self.connection.wait_for_event("Page.loadEventFired", session_id=self.session_id, timeout=timeout)
+
+    def call_function(self, body, *args, timeout=10):
+        """
+        Run a function body in the page, WebDriver execute_script style (arguments + return)
+
+        Returns:
+            The JSON value the function returned
+        """
+        expression = f"(function () {{ {body} }}).apply(null, {json.dumps(list(args))})"
+        result = self.send("Runtime.evaluate", {
+            'expression': expression,
+            'returnByValue': True
+        }, timeout=timeout)
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise CdpError(details.get('exception', {}).get('description') or details.get('text', "Script error"))
+        return result.get('result', {}).get('value')
+
+    @property
+    def current_url(self):
+        history = self.send("Page.getNavigationHistory")
+        return history['entries'][history['currentIndex']]['url']
+
+    def close(self):
+        try:
+            self.connection.send("Target.closeTarget", {'targetId': self.target_id})
+        except Exception:
+            pass
+        self.connection.discard_events(self.session_id)
+
+
+class CdpBrowser:
+    """A Chrome process driven over the DevTools protocol"""
+
+    START_TIMEOUT = 15
+
+    def __init__(self, chrome_args, chrome_binary=None, use_pipe=None, ignore_certificate_errors=False):
+        """
+        Initialize the browser (call start() to launch it)
+
+        Args:
+            chrome_args (list): Extra Chrome command-line arguments
+            chrome_binary (str, optional): Browser executable, found automatically if omitted
+            use_pipe (bool, optional): Force pipe (True) or debugging port (False) transport
+            ignore_certificate_errors (bool, optional): Accept self-signed certificates
+        """
+        self.chrome_args = list(chrome_args)
+        self.chrome_binary = chrome_binary
+        self.use_pipe = (os.name == 'posix' and hasattr(os, 'posix_spawn')) if use_pipe is None else use_pipe
+        self.ignore_certificate_errors = ignore_certificate_errors
+        self.process = None
+        self.transport = None
+        self.connection = None
+        self.user_data_dir = None
+
+    def start(self):
+        """Launch Chrome and open the DevTools connection"""
+        binary = self.chrome_binary or find_chrome_binary()
+        self.user_data_dir = tempfile.mkdtemp(prefix="simulanis-cdp-")
+        self.transport = PipeTransport() if self.use_pipe else WebSocketTransport()
+
+        args = [binary] + self.chrome_args + self.transport.chrome_args() + [
+            f"--user-data-dir={self.user_data_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "about:blank"
+        ]
+        try:
+            self.process = self.transport.spawn(args)
+            self.transport.connect(self.process, self.user_data_dir, self.START_TIMEOUT)
+            self.connection = CdpConnection(self.transport)
+            self.connection.send("Browser.getVersion", timeout=self.START_TIMEOUT)
+            if self.ignore_certificate_errors:
+                self.connection.send("Security.setIgnoreCertificateErrors", {'ignore': True})
+        except Exception:
+            self.quit()
+            raise
+        return self
+
+    def new_page(self):
+        """Open a new tab and attach to it"""
+        target_id = self.connection.send("Target.createTarget", {'url': "about:blank"})['targetId']
+        session_id = self.connection.send("Target.attachToTarget", {
+            'targetId': target_id,
+            'flatten': True
+        })['sessionId']
+        page = CdpPage(self.connection, target_id, session_id)
+        page.send("Page.enable")
+        return page
+
+    def is_alive(self):
+        """Health check with a single cheap command"""
+        if self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            self.connection.send("Browser.getVersion", timeout=2)
+            return True
+        except Exception:
+            return False
+
+    def delete_all_cookies(self):
+        """Clear cookies so the next login starts from a clean slate"""
+        self.connection.send("Storage.clearCookies")
+
+    def quit(self):
+        """Close the browser, killing it if it doesn't exit promptly"""
+        if self.connection is not None and self.process is not None and self.process.poll() is None:
+            try:
+                self.connection.send("Browser.close", timeout=2)
+            except Exception:
+                pass
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait(timeout=5)
+        if self.transport is not None:
+            self.transport.close()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+        self.process = None
+        self.connection = None
+        self.transport = None
+        self.user_data_dir = None
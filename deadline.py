@@ -0,0 +1,125 @@
+"""
+Simulanis Login Deadline
+
+A total time budget for one login, split into per-phase budgets. A watchdog
+timer runs while each phase is active; when it fires, the expiry callback
+force-kills the browser so that a hung chromedriver or a portal that never
+answers can't block the caller indefinitely. The time spent in each phase is
+recorded on the way (monotonic clock).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LoginTimeoutError(TimeoutError):
+    """Raised when a login phase exceeds its budget"""
+
+    def __init__(self, phase):
+        super().__init__(f"Login timed out during {phase}")
+        self.phase = phase
+
+
+class LoginDeadline:
+    """Per-phase watchdog for a single login attempt"""
+
+    PHASES = ("preflight", "driver_start", "navigate", "certificate", "fill", "submit", "verify")
+
+    # Seconds; generous enough that only a real hang trips them
+    DEFAULT_BUDGETS = {
+        'preflight': 5,
+        'driver_start': 30,
+        'navigate': 15,
+        'certificate': 10,
+        'fill': 10,
+        'submit': 5,
+        'verify': 15
+    }
+    DEFAULT_TOTAL = 60
+
+    def __init__(self, total=None, budgets=None, on_expire=None, log=None):
+        """
+        Initialize the deadline, starting the total budget clock
+
+        Args:
+            total (float, optional): Budget for the whole login in seconds
+            budgets (dict, optional): Per-phase budgets overriding DEFAULT_BUDGETS
+            on_expire (function, optional): Called from the watchdog thread when a budget runs out
+            log (function, optional): Logging function, signature: log(message)
+        """
+        self.total = self.DEFAULT_TOTAL if total is None else total
+        self.budgets = dict(self.DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.on_expire = on_expire or (lambda: None)
+        self.log = log or (lambda message: None)
+
+        self.started = time.monotonic()
+        self.current_phase = None
+        self.timed_out_phase = None
+        # Seconds spent per phase; a phase entered twice accumulates, a nested one is
+        # also counted in its parent
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def remaining(self, phase=None):
+        """Seconds left for a phase (or the whole login), never more than the total allows"""
+        left = self.total - (time.monotonic() - self.started)
+        if phase is not None:
+            left = min(left, self.budgets.get(phase, left))
+        return max(left, 0)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Run a block of the login under the watchdog
+
+        Yields the seconds available, so waits inside the block can use it as
+        their own timeout.
+
+        Raises:
+            LoginTimeoutError: If the phase ran out of time (the browser has been killed by then)
+        """
+        budget = self.remaining(name)
+        if budget <= 0:
+            self._expire(name)
+            raise LoginTimeoutError(name)
+
+        previous_phase, self.current_phase = self.current_phase, name
+        started = time.monotonic()
+        watchdog = threading.Timer(budget, self._expire, args=(name,))
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            yield budget
+        except Exception as e:
+            # A call whose own timeout matched the budget may fail just before the watchdog fires
+            if self.timed_out_phase is None and time.monotonic() - started >= budget:
+                self._expire(name)
+            # Killing the browser makes the blocked call fail with some driver error
+            if self.timed_out_phase == name:
+                raise LoginTimeoutError(name) from e
+            raise
+        finally:
+            watchdog.cancel()
+            self.current_phase = previous_phase
+            self.timings[name] = self.timings.get(name, 0) + time.monotonic() - started
+
+        if self.timed_out_phase == name:
+            raise LoginTimeoutError(name)
+
+    def elapsed(self):
+        """Seconds since the login started"""
+        return time.monotonic() - self.started
+
+    def _expire(self, name):
+        with self._lock:
+            if self.timed_out_phase is not None:
+                return
+            self.timed_out_phase = name
+
+        self.log(f"Login phase '{name}' exceeded its budget, killing the browser")
+        try:
+            self.on_expire()
+        except Exception as e:
+            self.log(f"Error killing browser: {str(e)}")
@@ -0,0 +1,173 @@
+"""
+Simulanis Login Driver Pool
+
+This module keeps a few live Chrome drivers around between logins so that a
+reconnect only has to navigate and submit instead of cold starting a browser.
+"""
+
+import threading
+import time
+
+
+class DriverPool:
+    """Small pool of warm WebDriver instances owned by LoginManager"""
+
+    DEFAULT_MAX_SIZE = 2
+    DEFAULT_IDLE_TIMEOUT = 300  # seconds
+
+    def __init__(self, driver_factory, max_size=None, idle_timeout=None, log=None, health_check=None):
+        """
+        Initialize the driver pool
+
+        Args:
+            driver_factory (function): Creates a new driver, signature: factory(key)
+            max_size (int, optional): Maximum number of idle drivers kept alive
+            idle_timeout (float, optional): Seconds an idle driver is kept before it is quit
+            log (function, optional): Logging function, signature: log(message)
+            health_check (function, optional): Returns True if a pooled driver still responds,
+                                               defaults to reading driver.current_url
+        """
+        self.driver_factory = driver_factory
+        self.health_check = health_check
+        self.max_size = self.DEFAULT_MAX_SIZE if max_size is None else max_size
+        self.idle_timeout = self.DEFAULT_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.log = log or (lambda message: None)
+
+        # Idle drivers as [key, driver, last_used] entries, most recently used last
+        self._idle = []
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._closed = False
+
+    def acquire(self, key):
+        """
+        Get a healthy driver for the given options key, starting one if needed
+
+        Args:
+            key (tuple): Identifies the browser configuration (e.g. the Chrome arguments)
+
+        Returns:
+            tuple: (driver, reused) where reused is True for a warm driver
+        """
+        self.prune()
+
+        while True:
+            with self._lock:
+                entry = None
+                for i in range(len(self._idle) - 1, -1, -1):
+                    if self._idle[i][0] == key:
+                        entry = self._idle.pop(i)
+                        break
+            if entry is None:
+                break
+
+            driver = entry[1]
+            if self.is_alive(driver):
+                self.log("Reusing warm browser session")
+                return driver, True
+
+            # Crashed since it was released - throw it away and try the next one
+            self.log("Pooled browser is no longer responding, respawning")
+            self.quit_driver(driver)
+
+        return self.driver_factory(key), False
+
+    def release(self, driver, key, healthy=True):
+        """
+        Return a driver to the pool after a login
+
+        Args:
+            driver: The driver obtained from acquire
+            key (tuple): The key it was acquired with
+            healthy (bool): False if the login failed in a way that may have broken the driver
+        """
+        if driver is None:
+            return
+
+        if healthy and not self._closed and self.max_size > 0:
+            try:
+                # Start the next login from a clean slate
+                driver.delete_all_cookies()
+            except Exception:
+                healthy = False
+
+        with self._lock:
+            keep = healthy and not self._closed and self.max_size > 0
+            if keep:
+                self._idle.append([key, driver, time.monotonic()])
+                # Drop the least recently used driver if we're over capacity
+                evicted = self._idle[:-self.max_size] if len(self._idle) > self.max_size else []
+                del self._idle[:len(evicted)]
+            else:
+                evicted = []
+
+        for entry in evicted:
+            self.quit_driver(entry[1])
+
+        if keep:
+            self._schedule_reaper()
+        else:
+            self.quit_driver(driver)
+
+    def prune(self):
+        """Quit drivers that have been idle for longer than the idle timeout"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [e for e in self._idle if now - e[2] >= self.idle_timeout]
+            self._idle = [e for e in self._idle if now - e[2] < self.idle_timeout]
+            next_expiry = min((self.idle_timeout - (now - e[2]) for e in self._idle), default=None)
+
+        for entry in expired:
+            self.log("Closing idle browser session")
+            self.quit_driver(entry[1])
+
+        if next_expiry is not None:
+            self._schedule_reaper(next_expiry)
+
+    def close(self):
+        """Quit every pooled driver and stop the reaper"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            if self._reaper is not None:
+                self._reaper.cancel()
+                self._reaper = None
+
+        for entry in idle:
+            self.quit_driver(entry[1])
+
+    def idle_count(self):
+        """Number of warm drivers currently in the pool"""
+        with self._lock:
+            return len(self._idle)
+
+    def is_alive(self, driver):
+        """Health check a driver with a single cheap command"""
+        if self.health_check is not None:
+            return self.health_check(driver)
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def quit_driver(self, driver):
+        """Quit a driver, ignoring errors from a browser that already died"""
+        try:
+            driver.quit()
+        except Exception as e:
+            self.log(f"Error closing browser: {str(e)}")
+
+    def _schedule_reaper(self, delay=None):
+        """Make sure a timer will evict idle drivers even if no further login happens"""
+        with self._lock:
+            if self._closed or (self._reaper is not None and self._reaper.is_alive()):
+                return
+            self._reaper = threading.Timer(self.idle_timeout if delay is None else delay, self._reap)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def _reap(self):
+        with self._lock:
+            self._reaper = None
+        self.prune()
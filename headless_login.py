@@ -0,0 +1,97 @@
+"""
+Simulanis Login Headless Runner
+
+Logs in without any UI, retrying transient failures as configured in
+headless_config.json. Nothing here imports tkinter, customtkinter or PIL, so
+runs at startup or from Task Scheduler/cron stay small and quick to start.
+`--headless` on any of the UI entry points hands over to this module, and
+`--daemon` on top of it keeps running instead (see login_daemon.py).
+
+Usage:
+    python headless_login.py [--config-dir DIR] [--daemon]
+
+The exit code tells scripts what happened:
+    0  Logged in, or already online
+    1  Temporary failure (network, portal or browser) - try again later
+    2  The portal rejected the credentials
+    3  Needs the user, e.g. no saved credentials or a certificate mismatch
+"""
+
+# Startup milestones for benchmarks/cold_start.py (no-op unless enabled)
+import startup_trace
+startup_trace.mark("interpreter")
+
+import argparse
+import sys
+
+from login_core import LoginManager
+from retry import FAILURE_AUTH, FAILURE_PERMANENT
+
+startup_trace.mark("imports")
+
+# Exit codes
+EXIT_SUCCESS = 0
+EXIT_TRANSIENT = 1
+EXIT_AUTH = 2
+EXIT_PERMANENT = 3
+
+
+def exit_code_for(result):
+    """
+    Map a login result to the runner's exit code
+
+    Args:
+        result (dict): Result of LoginManager.perform_login
+
+    Returns:
+        int: One of the EXIT_* codes
+    """
+    if result.get('success'):
+        return EXIT_SUCCESS
+    failure = result.get('failure')
+    if failure == FAILURE_AUTH:
+        return EXIT_AUTH
+    if failure == FAILURE_PERMANENT:
+        return EXIT_PERMANENT
+    return EXIT_TRANSIENT
+
+
+def run(config_dir=None):
+    """
+    Log in with the saved credentials, retrying transient failures
+
+    Args:
+        config_dir (str, optional): Directory with config.json and headless_config.json
+
+    Returns:
+        int: Exit code, see exit_code_for
+    """
+    login_mgr = LoginManager(headless=True, config_dir=config_dir)
+    startup_trace.mark("config")
+    try:
+        result = login_mgr.perform_login_with_retry()
+    finally:
+        login_mgr.close()
+    startup_trace.mark("headless_result")
+
+    exit_code = exit_code_for(result)
+    login_mgr.log(f"Headless login finished: {result.get('message') or 'no message'} (exit code {exit_code})")
+    return exit_code
+
+
+def main(argv=None):
+    """Command line entry point, returns the exit code"""
+    parser = argparse.ArgumentParser(description="Simulanis Login without a UI")
+    parser.add_argument('--config-dir', help='Directory with config.json (defaults to the application directory)')
+    parser.add_argument('--daemon', action='store_true', help='Keep running and log in again whenever the session drops')
+    parser.add_argument('--profile', action='store_true', help='Write a profile of the login to <config dir>/profiles/')
+    # The UI entry points pass their own flags (e.g. --headless) straight through
+    args, _ = parser.parse_known_args(argv)
+    if args.daemon:
+        import login_daemon
+        return login_daemon.run(args.config_dir)
+    return run(args.config_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
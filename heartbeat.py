@@ -0,0 +1,209 @@
+"""
+Simulanis Login Session Heartbeat
+
+Re-checks a logged in session in the background with one HEAD request over
+a kept-alive connection: by default to the generate_204 connectivity check
+(a 204 means the portal lets us through, any other answer that it
+intercepts us again), or to the URL in "heartbeat_url", e.g. the portal's
+keepalive page, where any 2xx counts as alive and a redirect to the portal
+or a 4xx as the session being gone. Server errors and failed connections
+say nothing about the session and are reported as unreachable.
+
+The interval adapts: right after a login or a change of state it is
+heartbeat_min_interval seconds (default 5), and it doubles with every
+result that matches the previous one up to heartbeat_max_interval (default
+120), so a stable session costs one tiny request every two minutes. hold()
+keeps it checking fast for a while, e.g. around an expected expiry.
+"""
+
+import threading
+import time
+from urllib.parse import urljoin, urlparse
+
+# Heartbeat results, passed to listeners as event['state']
+HEARTBEAT_ALIVE = "alive"
+HEARTBEAT_SESSION_LOST = "session_lost"
+HEARTBEAT_UNREACHABLE = "unreachable"
+
+
+class Heartbeat:
+    """Background HEAD requests with an adaptive interval"""
+
+    DEFAULT_MIN_INTERVAL = 5     # seconds, after a login or a change
+    DEFAULT_MAX_INTERVAL = 120   # seconds, once the state has been stable for a while
+    DEFAULT_TIMEOUT = 2          # seconds per request
+
+    def __init__(self, url, on_change, min_interval=None, max_interval=None, timeout=None,
+                 expected_statuses=None, portal_host=None, log=None):
+        """
+        Initialize the heartbeat (call start() to run it)
+
+        Args:
+            url (str): URL to send the HEAD requests to
+            on_change (function): Called from the heartbeat thread when the state changes,
+                                  signature: on_change(event), see beat()
+            min_interval (float, optional): Seconds between beats after a login or a change
+            max_interval (float, optional): Upper bound the interval grows to while stable
+            timeout (float, optional): Seconds to wait for an answer
+            expected_statuses (tuple, optional): Statuses meaning alive, defaults to any 2xx; with
+                                                 these, any other answer below 500 means intercepted
+            portal_host (str, optional): Host of the login portal; without expected_statuses only a
+                                         redirect there means the session is gone (any redirect if not given)
+            log (function, optional): Logging function, signature: log(message)
+        """
+        self.url = url
+        self.on_change = on_change
+        self.min_interval = self.DEFAULT_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_interval = self.DEFAULT_MAX_INTERVAL if max_interval is None else max_interval
+        self.timeout = self.DEFAULT_TIMEOUT if timeout is None else timeout
+        self.expected_statuses = expected_statuses
+        self.portal_host = portal_host
+        self.log = log or (lambda message: None)
+
+        self.state = None
+        self.interval = self.min_interval
+        self.beats = 0
+        self.last_alive = None
+        # (interval, monotonic end) while hold() caps the interval
+        self._hold = None
+        self._session = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start beating in a daemon thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="session-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and drop the pooled connection"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def reset(self):
+        """Go back to the fast interval, e.g. after a login"""
+        self.interval = self.min_interval
+        self._wake.set()
+
+    def hold(self, interval, duration):
+        """
+        Check at least every interval seconds for the next duration seconds
+
+        Args:
+            interval (float): Longest interval allowed while holding
+            duration (float): Seconds to hold for
+        """
+        self._hold = (interval, time.monotonic() + duration)
+        self.interval = min(self.interval, interval)
+        self._wake.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def get_session(self):
+        """requests session kept for the heartbeat's lifetime, so beats reuse one connection"""
+        if self._session is None:
+            import requests
+            import urllib3
+            from requests.adapters import HTTPAdapter
+
+            # A keepalive page on the portal has its self-signed certificate
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            self._session = requests.Session()
+            self._session.verify = False
+            self._session.trust_env = False
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+        return self._session
+
+    def check(self):
+        """
+        Send one HEAD request
+
+        Returns:
+            tuple: (state, latency in seconds) with state one of the HEARTBEAT_* values
+        """
+        started = time.monotonic()
+        try:
+            response = self.get_session().head(self.url, timeout=self.timeout, allow_redirects=False)
+        except Exception:
+            return HEARTBEAT_UNREACHABLE, time.monotonic() - started
+        latency = time.monotonic() - started
+        return self.classify(response), latency
+
+    def classify(self, response):
+        """
+        Tell from an answer whether the session is alive, gone or can't be judged
+
+        Returns:
+            str: One of the HEARTBEAT_* values
+        """
+        status = response.status_code
+        if self.expected_statuses is not None and status in self.expected_statuses:
+            return HEARTBEAT_ALIVE
+        if self.expected_statuses is None and 200 <= status < 300:
+            return HEARTBEAT_ALIVE
+        # A struggling server hasn't told us anything about the session
+        if status >= 500:
+            return HEARTBEAT_UNREACHABLE
+        # A keepalive page only counts as lost when it sends us to the portal
+        if self.expected_statuses is None and 300 <= status < 400 and self.portal_host:
+            location = urljoin(self.url, response.headers.get('Location', ""))
+            if urlparse(location).hostname != self.portal_host:
+                return HEARTBEAT_UNREACHABLE
+        # Sent to the login page, or any other answer from a generate_204 endpoint: intercepted again
+        return HEARTBEAT_SESSION_LOST
+
+    def beat(self):
+        """
+        Check once, adapt the interval and tell on_change if the state changed
+
+        Returns:
+            dict: Event with keys state, previous, latency, interval (seconds to the next beat)
+                  and last_alive (epoch time of the last beat that found the session alive)
+        """
+        state, latency = self.check()
+        self.beats += 1
+        if state == HEARTBEAT_ALIVE:
+            self.last_alive = time.time()
+        previous, self.state = self.state, state
+        if state == previous:
+            self.interval = min(self.interval * 2, self.max_interval)
+        else:
+            self.interval = self.min_interval
+        if self._hold is not None:
+            if time.monotonic() < self._hold[1]:
+                self.interval = min(self.interval, self._hold[0])
+            else:
+                self._hold = None
+
+        event = {'state': state, 'previous': previous, 'latency': latency, 'interval': self.interval,
+                 'last_alive': self.last_alive}
+        if state != previous:
+            self.log(f"Heartbeat: {state} ({latency * 1000:.0f} ms), next check in {self.interval:g} s")
+            try:
+                self.on_change(event)
+            except Exception as e:
+                self.log(f"Heartbeat listener failed: {str(e)}")
+        return event
+
+    def _run(self):
+        while not self._stopped.is_set():
+            # reset() cuts a long wait short; stop() ends it
+            if self._wake.wait(self.interval):
+                self._wake.clear()
+                if self._stopped.is_set():
+                    break
+            self.beat()
@@ -0,0 +1,376 @@
+"""
+Simulanis Login HTTP Backend
+
+This module submits the captive portal login form over plain HTTP(S) using a
+pooled requests session, without starting a browser. LoginManager uses it as
+the fast path and falls back to Selenium when the form cannot be parsed.
+"""
+
+import hashlib
+import http.client
+import socket
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+
+def unverified_ssl_context():
+    """
+    TLS client context that accepts any certificate
+
+    Built without create_default_context(), which loads the system CA store
+    (tens of milliseconds) only for it to go unused.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def get_certificate_fingerprint(url, timeout=3):
+    """
+    Fetch the SHA-256 fingerprint of the certificate a server presents
+
+    Args:
+        url (str): Any https URL on the server
+        timeout (float, optional): Connect timeout in seconds
+
+    Returns:
+        str: Fingerprint as colon separated upper case hex pairs
+    """
+    parsed = urlparse(url)
+    port = parsed.port or 443
+
+    # We only want the certificate, not a validated connection
+    context = unverified_ssl_context()
+
+    with socket.create_connection((parsed.hostname, port), timeout=timeout) as sock:
+        with context.wrap_socket(sock, server_hostname=parsed.hostname) as tls:
+            der_cert = tls.getpeercert(binary_form=True)
+
+    digest = hashlib.sha256(der_cert).hexdigest().upper()
+    return ":".join(digest[i:i + 2] for i in range(0, len(digest), 2))
+
+
+# Pre-flight portal states
+PORTAL_NEEDS_LOGIN = "needs_login"
+PORTAL_ONLINE = "already_online"
+PORTAL_UNREACHABLE = "unreachable"
+
+# Answers 204 No Content only when traffic really reaches the internet
+DEFAULT_CONNECTIVITY_CHECK_URL = "http://connectivitycheck.gstatic.com/generate_204"
+DEFAULT_PREFLIGHT_TIMEOUT = 0.5
+
+
+def check_connectivity(url, timeout):
+    """
+    Check whether a generate_204 style endpoint answers directly
+
+    Returns:
+        bool: True on a 204, False when the request is intercepted (e.g. redirected to the portal)
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "https":
+        # Only a genuine 204 counts, so the certificate doesn't need to be trusted
+        context = unverified_ssl_context()
+        connection = http.client.HTTPSConnection(parsed.hostname, parsed.port, timeout=timeout, context=context)
+    else:
+        connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+    try:
+        connection.request("GET", parsed.path or "/", headers={'Connection': "close"})
+        return connection.getresponse().status == 204
+    finally:
+        connection.close()
+
+
+def check_portal_reachable(url, timeout):
+    """Check whether the portal accepts TCP connections"""
+    parsed = urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    with socket.create_connection((parsed.hostname, port), timeout=timeout):
+        return True
+
+
+def probe_portal_state(target_url, connectivity_url=DEFAULT_CONNECTIVITY_CHECK_URL, timeout=DEFAULT_PREFLIGHT_TIMEOUT):
+    """
+    Classify the network state before any login is attempted
+
+    The internet check and the portal check run in parallel, and the probe
+    returns as soon as the internet check succeeds. Only a portal that
+    refuses the connection or can't be routed to counts as unreachable; one
+    that is merely slow to answer still gets a login attempt, whose own
+    timeouts decide.
+
+    Args:
+        target_url (str): URL of the portal login page
+        connectivity_url (str, optional): Endpoint that answers 204 when online
+        timeout (float, optional): Time budget for the whole probe in seconds
+
+    Returns:
+        str: PORTAL_ONLINE, PORTAL_NEEDS_LOGIN or PORTAL_UNREACHABLE
+    """
+    deadline = time.monotonic() + timeout
+    executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        online = executor.submit(check_connectivity, connectivity_url, timeout)
+        portal = executor.submit(check_portal_reachable, target_url, timeout)
+
+        # Either answer may be enough on its own, so look at whichever lands first
+        pending = {online, portal}
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when="FIRST_COMPLETED")
+            if not done:
+                break
+            if online in done and not online.exception() and online.result():
+                return PORTAL_ONLINE
+
+        # A busy portal can take longer than the probe's budget to accept a connection
+        if not portal.done():
+            return PORTAL_NEEDS_LOGIN
+        error = portal.exception()
+        if error is None or isinstance(error, (TimeoutError, socket.timeout)):
+            return PORTAL_NEEDS_LOGIN
+        return PORTAL_UNREACHABLE
+    finally:
+        # Don't wait for a check that is still hanging on its timeout
+        executor.shutdown(wait=False)
+
+
+def normalize_fingerprint(fingerprint):
+    """Normalize a fingerprint so differently formatted copies compare equal"""
+    return (fingerprint or "").replace(":", "").replace(" ", "").upper()
+
+
+class FormNotFoundError(Exception):
+    """Raised when the login form cannot be parsed from the portal page"""
+
+
+class CertificateMismatchError(ConnectionError):
+    """Raised when the portal presents a different certificate than the pinned one"""
+
+
+class LoginFormParser(HTMLParser):
+    """Collect forms, their input controls and meta refresh targets from a page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms = []
+        self.orphan_controls = []
+        self.meta_refresh = None
+        self._current_form = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag == "form":
+            self._current_form = {
+                'action': attrs.get('action') or "",
+                'method': (attrs.get('method') or "get").lower(),
+                'controls': []
+            }
+            self.forms.append(self._current_form)
+        elif tag in ("input", "button"):
+            control = {
+                'id': attrs.get('id'),
+                'name': attrs.get('name'),
+                'type': (attrs.get('type') or ("submit" if tag == "button" else "text")).lower(),
+                'value': attrs.get('value') or ""
+            }
+            if self._current_form is not None:
+                self._current_form['controls'].append(control)
+            else:
+                self.orphan_controls.append(control)
+        elif tag == "meta" and (attrs.get('http-equiv') or "").lower() == "refresh":
+            # content looks like "0; url=https://..."
+            content = attrs.get('content') or ""
+            if "url=" in content.lower():
+                self.meta_refresh = content[content.lower().index("url=") + 4:].strip(" '\"")
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._current_form = None
+
+
+class HttpLoginBackend:
+    """Browserless login against the captive portal using a pooled requests session"""
+
+    # Element IDs of the portal login form
+    USERNAME_FIELD_ID = "user"
+    PASSWORD_FIELD_ID = "passwd"
+    SUBMIT_BUTTON_ID = "submitbtn"
+
+    # (connect, read) timeouts in seconds
+    DEFAULT_TIMEOUT = (3, 10)
+    MAX_REDIRECTS = 10
+
+    def __init__(self, target_url, timeout=None, log=None):
+        """
+        Initialize the HTTP backend
+
+        Args:
+            target_url (str): URL of the portal login page
+            timeout (tuple, optional): (connect, read) timeouts in seconds
+            log (function, optional): Logging function, signature: log(message)
+        """
+        self.target_url = target_url
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self.log = log or (lambda message: None)
+        self.portal_host = urlparse(target_url).netloc
+
+        # requests is only loaded for an actual login, the pre-flight probes don't need it
+        import requests
+        import urllib3
+        from requests.adapters import HTTPAdapter
+        
+        # The portal uses a self-signed certificate, so we don't want a warning per request
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        
+        # One session for the lifetime of the backend so TCP/TLS connections are reused
+        self.session = requests.Session()
+        self.session.verify = False
+        # REQUESTS_CA_BUNDLE would otherwise override session.verify for every request
+        self.session.trust_env = False
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def parse_login_form(self, page_source, page_url):
+        """
+        Find the login form in a page
+
+        Args:
+            page_source (str): HTML of the login page
+            page_url (str): URL the page was loaded from
+
+        Returns:
+            dict: Form description with keys action, method and data (the payload without credentials)
+                  plus the field names to use for the username and password
+
+        Raises:
+            FormNotFoundError: If the page has no postable form with the expected controls
+        """
+        parser = LoginFormParser()
+        parser.feed(page_source)
+
+        for form in parser.forms:
+            controls_by_id = {c['id']: c for c in form['controls'] if c['id']}
+            username_control = controls_by_id.get(self.USERNAME_FIELD_ID)
+            password_control = controls_by_id.get(self.PASSWORD_FIELD_ID)
+            if not username_control or not password_control:
+                continue
+
+            # A form driven entirely by JavaScript has unnamed controls we can't post
+            if not username_control['name'] or not password_control['name']:
+                raise FormNotFoundError("Login form fields have no names")
+
+            # Carry over hidden fields and the submit button value, like a browser would
+            data = {}
+            for control in form['controls']:
+                if not control['name'] or control is username_control or control is password_control:
+                    continue
+                if control['type'] in ("submit", "button", "image"):
+                    if control['id'] != self.SUBMIT_BUTTON_ID:
+                        continue
+                elif control['type'] in ("checkbox", "radio", "reset", "file"):
+                    continue
+                data[control['name']] = control['value']
+
+            return {
+                'action': urljoin(page_url, form['action'] or page_url),
+                'method': form['method'],
+                'data': data,
+                'username_field': username_control['name'],
+                'password_field': password_control['name']
+            }
+
+        if any(c['id'] == self.USERNAME_FIELD_ID for c in parser.orphan_controls):
+            raise FormNotFoundError("Login fields are not inside a form")
+        raise FormNotFoundError("Login form not found on page")
+
+    def fetch_login_form(self):
+        """
+        Load the login page and parse its form
+
+        Returns:
+            dict: Form description, see parse_login_form
+
+        Raises:
+            FormNotFoundError: If the login form cannot be parsed
+            requests.RequestException: On network errors
+        """
+        response = self.session.get(self.target_url, timeout=self.timeout)
+        response.raise_for_status()
+        return self.parse_login_form(response.text, response.url)
+
+    def post_login_form(self, form, username, password):
+        """
+        Post the credentials and follow the portal's redirects
+
+        Args:
+            form (dict): Form description from fetch_login_form
+            username (str): Username to log in with
+            password (str): Password to log in with
+
+        Returns:
+            dict: Page state with keys:
+                url (str): Final URL after redirects
+                page_source (str): HTML of the final portal page
+                visited (list): Every URL passed through after submitting
+
+        Raises:
+            requests.RequestException: On network errors
+        """
+        data = dict(form['data'])
+        data[form['username_field']] = username
+        data[form['password_field']] = password
+
+        self.log(f"Posting login form to {form['action']}")
+        if form['method'] == "post":
+            response = self.session.post(form['action'], data=data, timeout=self.timeout, allow_redirects=False)
+        else:
+            response = self.session.get(form['action'], params=data, timeout=self.timeout, allow_redirects=False)
+
+        return self.follow_redirects(response)
+
+    def submit(self, username, password):
+        """Load the login page and submit the credentials in one go"""
+        return self.post_login_form(self.fetch_login_form(), username, password)
+
+    def follow_redirects(self, response):
+        """
+        Follow redirects while they stay on the portal host
+
+        A redirect that leaves the portal (e.g. to simulanis.com) is recorded
+        but not fetched - its URL is all the outcome rules need.
+        """
+        visited = [response.url]
+        page_source = response.text
+
+        for _ in range(self.MAX_REDIRECTS):
+            if response.is_redirect:
+                next_url = urljoin(response.url, response.headers.get('Location', ''))
+            else:
+                refresh = LoginFormParser()
+                refresh.feed(response.text)
+                if not refresh.meta_refresh:
+                    break
+                next_url = urljoin(response.url, refresh.meta_refresh)
+
+            visited.append(next_url)
+            if urlparse(next_url).netloc != self.portal_host:
+                break
+
+            response = self.session.get(next_url, timeout=self.timeout, allow_redirects=False)
+            page_source = response.text
+
+        return {
+            'url': visited[-1],
+            'page_source': page_source,
+            'visited': visited
+        }
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
@@ -0,0 +1,270 @@
+"""
+Simulanis Login Daemon
+
+Keeps the portal session alive for as long as it runs: it checks the portal
+state every daemon_check_interval seconds (headless_config.json, default 60)
+with the same browserless pre-flight probe perform_login uses, and logs in
+again through the configured backends (HTTP first with the default "auto")
+as soon as the session is gone. Between checks it blocks on an event, so an
+idle daemon uses no CPU; other parts of the app can call wake() to have it
+check right away. Once logged in, the session heartbeat (heartbeat.py)
+takes over the watching: the interval check pauses while the heartbeat
+sees the session alive, and a lost session it reports starts a check
+immediately. After a failed login, or while the heartbeat can't confirm the
+session, the interval check carries on.
+
+On Linux it also listens for kernel network notifications (netlink_events.py):
+a cable plug, Wi-Fi join or new DHCP address starts a check within
+milliseconds, and while no interface has a link there are no checks, logins
+or retry waits at all. Set "network_events": false in headless_config.json
+to rely on the interval alone.
+
+SIGTERM, SIGINT (and SIGBREAK on Windows) shut it down cleanly: a login or
+retry wait in progress is cancelled and pooled browsers are closed.
+
+Usage:
+    python login_daemon.py [--config-dir DIR] [--interval SECONDS]
+    python simulanis_login.py --daemon
+
+Exit codes are those of headless_login.py; the daemon only exits on its own
+when the portal rejects the credentials (2) or the user is needed (3).
+"""
+
+import argparse
+import signal
+import sys
+import threading
+import time
+
+from headless_login import EXIT_AUTH, EXIT_PERMANENT, EXIT_SUCCESS
+from heartbeat import HEARTBEAT_ALIVE
+from login_core import LoginManager, PORTAL_NEEDS_LOGIN, PORTAL_ONLINE, PORTAL_UNREACHABLE
+from netlink_events import EVENT_LINK_DOWN, create_event_source
+from retry import FAILURE_AUTH, FAILURE_PERMANENT
+
+
+class LoginDaemon:
+    """Resident loop that notices a lost portal session and logs in again"""
+
+    DEFAULT_CHECK_INTERVAL = 60  # seconds
+
+    def __init__(self, login_mgr, check_interval=None, event_source=None):
+        """
+        Initialize the daemon
+
+        Args:
+            login_mgr (LoginManager): Manager used for probing and logging in, closed by run()
+            check_interval (float, optional): Seconds between session checks, defaults to
+                                              daemon_check_interval in the headless config
+            event_source (EventSource, optional): Network change notifications, see
+                                                  netlink_events.py; started and stopped by run()
+        """
+        self.login_mgr = login_mgr
+        self.event_source = event_source
+        settings = getattr(login_mgr, 'headless_config', login_mgr.config)
+        if check_interval is None:
+            check_interval = settings.get('daemon_check_interval', self.DEFAULT_CHECK_INTERVAL)
+        self.check_interval = check_interval
+
+        self.portal_state = None
+        self.last_result = None
+        self.exit_code = EXIT_SUCCESS
+        self.scheduler = login_mgr.create_retry_scheduler()
+
+        # Set by wake() and stop(); the loop sleeps on it between checks
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._wake_reasons = []
+        self._lock = threading.Lock()
+        
+        # The session heartbeat (see heartbeat.py) reports drops between checks
+        login_mgr.add_session_listener(self.on_session_event)
+
+    def wake(self, reason="requested"):
+        """Check the session now instead of at the next interval (thread-safe)"""
+        with self._lock:
+            self._wake_reasons.append(reason)
+        self._wake.set()
+
+    def stop(self):
+        """Ask the daemon to exit, interrupting a retry wait (thread-safe)"""
+        self._stopping.set()
+        self.scheduler.cancel()
+        self._wake.set()
+
+    @property
+    def stopping(self):
+        return self._stopping.is_set()
+
+    @property
+    def suspended(self):
+        """True while the event source knows that no interface has a link"""
+        return self.event_source is not None and not self.event_source.link_up
+
+    @property
+    def heartbeat_watching(self):
+        """True while the heartbeat sees the session alive after a successful login, so it will
+        wake us when that changes"""
+        heartbeat = self.login_mgr.heartbeat
+        if heartbeat is None or not heartbeat.running or heartbeat.state != HEARTBEAT_ALIVE:
+            return False
+        return self.last_result is None or bool(self.last_result.get('success'))
+
+    def on_session_event(self, event):
+        """Heartbeat callback: check (and log in) as soon as the session looks gone"""
+        if event['state'] != HEARTBEAT_ALIVE:
+            self.wake(f"heartbeat: {event['state'].replace('_', ' ')}")
+
+    def on_network_event(self, event):
+        """Event source callback: check right away, or stop trying while the link is down"""
+        if event['kind'] == EVENT_LINK_DOWN and self.suspended:
+            self.login_mgr.log(f"Daemon: link down on {event['interface']}, suspending logins")
+            self.login_mgr.is_connected = False
+            self.portal_state = None
+            # Ends a retry wait; the loop then sleeps until a link comes back
+            self.scheduler.cancel()
+            return
+        self.wake(f"{event['kind'].replace('_', ' ')} on {event['interface']}")
+
+    def check_session(self):
+        """
+        Probe the portal and log in if the session is gone
+
+        Returns:
+            str: PORTAL_ONLINE, PORTAL_NEEDS_LOGIN or PORTAL_UNREACHABLE as probed
+        """
+        state = self.login_mgr.check_portal_state()
+        previous, self.portal_state = self.portal_state, state
+
+        if state == PORTAL_ONLINE:
+            if previous != PORTAL_ONLINE:
+                self.login_mgr.log("Daemon: session is up")
+            self.login_mgr.is_connected = True
+        elif state == PORTAL_UNREACHABLE:
+            # Nothing to log in to; the next check tries again
+            if previous != PORTAL_UNREACHABLE:
+                self.login_mgr.log("Daemon: portal unreachable, waiting for the network")
+            self.login_mgr.is_connected = False
+        elif state == PORTAL_NEEDS_LOGIN:
+            if self.login_mgr.is_connected:
+                self.login_mgr.log("Daemon: portal session lost, logging in again")
+            self.login_mgr.is_connected = False
+            self.login()
+        return state
+
+    def login(self):
+        """Log in with retries, stopping the daemon if the user has to step in"""
+        def attempt():
+            # Nobody is watching, and only headless browsers are kept warm in the pool
+            result = self.login_mgr.perform_login(headless_mode=True)
+            # Cancelling here can't be lost to the scheduler's reset and ends any retry wait
+            if self.stopping or self.suspended:
+                self.scheduler.cancel()
+            return result
+
+        started = time.monotonic()
+        result = self.scheduler.run(attempt)
+        self.last_result = result
+        if result.get('success'):
+            self.portal_state = PORTAL_ONLINE
+            self.login_mgr.log(f"Daemon: {result.get('message')} in {time.monotonic() - started:.2f} s")
+            return result
+
+        # Repeating a rejected password every interval could lock the account
+        failure = result.get('failure')
+        if failure == FAILURE_AUTH:
+            self.exit_code = EXIT_AUTH
+        elif failure == FAILURE_PERMANENT:
+            self.exit_code = EXIT_PERMANENT
+        if failure in (FAILURE_AUTH, FAILURE_PERMANENT) and not self.stopping:
+            self.login_mgr.log(f"Daemon: stopping, {result.get('message')}")
+            self.stop()
+        return result
+
+    def run(self):
+        """
+        Check the session until stopped, then release pooled browsers and connections
+
+        Returns:
+            int: Exit code, see headless_login.py
+        """
+        self.login_mgr.log(f"Daemon started, checking the session every {self.check_interval} s")
+        try:
+            self.start_event_source()
+            while not self.stopping:
+                if not self.suspended:
+                    try:
+                        self.check_session()
+                    except Exception as e:
+                        # A failed check must not end the daemon; the next one may work
+                        self.login_mgr.log(f"Daemon: session check failed - {str(e)}")
+
+                if self.stopping:
+                    break
+                # Without a link only a network event (or stop) can change anything, and
+                # while the heartbeat sees the session alive it wakes us when that changes.
+                # It only reports changes, so a session it already saw lost needs the interval
+                idle = self.suspended or self.heartbeat_watching
+                self._wake.wait(None if idle else self.check_interval)
+                self._wake.clear()
+                with self._lock:
+                    reasons, self._wake_reasons = self._wake_reasons, []
+                if reasons and not self.stopping:
+                    self.login_mgr.log(f"Daemon: checking now ({', '.join(reasons)})")
+        finally:
+            if self.event_source is not None:
+                self.event_source.stop()
+            self.login_mgr.close()
+            self.login_mgr.log("Daemon stopped")
+        return self.exit_code
+
+    def start_event_source(self):
+        """Subscribe to network changes, carrying on with the interval alone if that fails"""
+        if self.event_source is None:
+            return
+        try:
+            self.event_source.start(self.on_network_event)
+        except Exception as e:
+            self.login_mgr.log(f"Daemon: network events unavailable - {str(e)}")
+            self.event_source = None
+
+    def install_signal_handlers(self):
+        """Stop cleanly on SIGTERM/SIGINT (and SIGBREAK on Windows); main thread only"""
+        for name in ("SIGTERM", "SIGINT", "SIGBREAK"):
+            signum = getattr(signal, name, None)
+            if signum is not None:
+                signal.signal(signum, lambda signum, frame: self.stop())
+
+
+def run(config_dir=None, check_interval=None):
+    """
+    Run the daemon with the saved credentials until it is stopped
+
+    Args:
+        config_dir (str, optional): Directory with config.json and headless_config.json
+        check_interval (float, optional): Seconds between session checks
+
+    Returns:
+        int: Exit code, see headless_login.py
+    """
+    login_mgr = LoginManager(headless=True, config_dir=config_dir)
+    event_source = None
+    if login_mgr.headless_config.get('network_events', True):
+        event_source = create_event_source(login_mgr.log)
+    daemon = LoginDaemon(login_mgr, check_interval, event_source)
+    daemon.install_signal_handlers()
+    return daemon.run()
+
+
+def main(argv=None):
+    """Command line entry point, returns the exit code"""
+    parser = argparse.ArgumentParser(description="Keep the Simulanis portal session alive")
+    parser.add_argument('--config-dir', help='Directory with config.json (defaults to the application directory)')
+    parser.add_argument('--interval', type=float, help='Seconds between session checks')
+    # The launchers pass their own flags (e.g. --daemon) straight through
+    args, _ = parser.parse_known_args(argv)
+    return run(args.config_dir, args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Simulanis Login Lock
+
+Makes sure only one process logs in at a time. The mini UI's auto-login, the
+full UI started with --from-mini, the startup shortcut and the headless
+launchers can all start at the same moment, and each would otherwise open
+its own browser against the portal.
+
+The lock is an OS file lock (fcntl.flock, or msvcrt.locking on Windows) on
+login.lock in the config directory, so it is released by the OS when its
+holder exits or crashes. The holder writes its result to login_result.json
+before releasing it; a process that had to wait reads that file and reuses
+the result instead of logging in again.
+"""
+
+import json
+import os
+import sys
+import time
+
+LOCK_FILENAME = "login.lock"
+RESULT_FILENAME = "login_result.json"
+
+# Result keys shared with waiting processes (no timings, nothing secret)
+SHARED_KEYS = ('success', 'message', 'already_logged_in', 'failure', 'portal_state', 'timed_out_phase')
+
+POLL_INTERVAL = 0.05  # seconds between attempts while waiting
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(fd):
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class LoginLock:
+    """System-wide login lock plus the result of the last login made under it"""
+
+    DEFAULT_WAIT = 60  # seconds to wait for another process's login
+
+    def __init__(self, config_dir, log=None):
+        """
+        Initialize the lock (nothing is opened until acquire())
+
+        Args:
+            config_dir (str): Directory holding the lock and result files
+            log (function, optional): Logging function, signature: log(message)
+        """
+        self.lock_path = os.path.join(config_dir, LOCK_FILENAME)
+        self.result_path = os.path.join(config_dir, RESULT_FILENAME)
+        self.log = log or (lambda message: None)
+        self._fd = None
+
+    @property
+    def held(self):
+        return self._fd is not None
+
+    def acquire(self, timeout=0):
+        """
+        Take the lock
+
+        Args:
+            timeout (float, optional): Seconds to wait for another holder, 0 to only try once,
+                                       None to wait for as long as it takes
+
+        Returns:
+            bool: True if the lock is now held
+
+        Raises:
+            OSError: If the lock file can't be opened, e.g. in a read-only directory
+        """
+        if self._fd is None:
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while not _try_lock(self._fd):
+            if give_up is not None and time.monotonic() >= give_up:
+                os.close(self._fd)
+                self._fd = None
+                return False
+            time.sleep(POLL_INTERVAL)
+
+        # Record the holder, for whoever is looking at a stuck lock
+        try:
+            os.ftruncate(self._fd, 0)
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, str(os.getpid()).encode())
+        except OSError:
+            pass
+        return True
+
+    def release(self):
+        """Let the next process log in (no-op if not held)"""
+        if self._fd is None:
+            return
+        try:
+            _unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def publish(self, result, username):
+        """
+        Share a login result with the processes waiting for the lock
+
+        Args:
+            result (dict): Result returned by LoginManager.perform_login
+            username (str): User the result is for
+        """
+        shared = {
+            'time': time.time(),
+            'pid': os.getpid(),
+            'username': username,
+            'result': {key: result[key] for key in SHARED_KEYS if key in result}
+        }
+        try:
+            # Readers must never see a half-written file
+            temp_path = f"{self.result_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(shared, f)
+            os.replace(temp_path, self.result_path)
+        except Exception as e:
+            self.log(f"Error sharing login result: {str(e)}")
+
+    def read_result(self, username, since):
+        """
+        The result another process published
+
+        Args:
+            username (str): Only a result for this user counts
+            since (float): Only a result published after this epoch time counts
+
+        Returns:
+            dict: The shared result keys, or None if there is no matching result
+        """
+        try:
+            with open(self.result_path, 'r') as f:
+                shared = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.log(f"Error reading shared login result: {str(e)}")
+            return None
+        if shared.get('username') != username or shared.get('time', 0) < since:
+            return None
+        return shared.get('result')
@@ -1,33 +1,42 @@
+# Startup milestones for benchmarks/cold_start.py (no-op unless enabled)
+import startup_trace
+startup_trace.mark("interpreter")
+
+import sys
+
+# Headless runs never need Tk, so hand over before importing it
+if __name__ == "__main__" and "--headless" in sys.argv:
+    import headless_login
+    sys.exit(headless_login.main())
+
 import tkinter as tk
 from tkinter import ttk
 import customtkinter as ctk
-from PIL import Image, ImageTk, ImageOps
+from PIL import Image, ImageTk
 import json
 import os
-import keyring
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import time
-import sys
 from pathlib import Path
-import requests
 import math
 import subprocess
 import tkinter.messagebox as messagebox
 import threading
-import pystray
 import ctypes
 
 # Import the login core
 from login_core import LoginManager
+from background_login import BackgroundLogin
+from heartbeat import HEARTBEAT_ALIVE, HEARTBEAT_SESSION_LOST
+import profiling
+
+startup_trace.mark("imports")
 
 # The main application class that handles UI switching
 class SimulanisLoginApp(ctk.CTk):
+    @profiling.profiled
     def __init__(self):
         super().__init__()
+        startup_trace.mark("tk_init")
         
         # Application constants
         self.APP_NAME = "Simulanis Login"
@@ -60,11 +69,17 @@ class SimulanisLoginApp(ctk.CTk):
         self.config_dir = str(Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent)
         self.log(f"Using config directory: {self.config_dir}")
         
-        # Create the login manager with status callback and config directory
-        self.login_mgr = LoginManager(ui_callback=self.update_status, config_dir=self.config_dir)
+        # Create the login manager with status callback and config directory; logins run on a
+        # worker thread, its status updates are shown on the Tk loop
+        self.background_login = BackgroundLogin(self, self.update_status)
+        self.login_mgr = LoginManager(ui_callback=self.background_login.status_callback, config_dir=self.config_dir)
+        
+        # The session heartbeat reports drops after a successful login
+        self.login_mgr.add_session_listener(self.on_session_event)
         
         # Load saved configuration and update variables
         self.load_config()
+        startup_trace.mark("config")
         
         # Check command line arguments
         self.process_command_line_args()
@@ -91,6 +106,9 @@ class SimulanisLoginApp(ctk.CTk):
         
         # Check for auto-login if needed
         self.handle_auto_login()
+        
+        # Record when the window is first shown
+        self.bind("<Map>", lambda event: startup_trace.mark("first_window"), add="+")
     
     def get_initial_mode(self):
         """Determine the initial UI mode based on command line arguments"""
@@ -104,10 +122,7 @@ class SimulanisLoginApp(ctk.CTk):
     
     def process_command_line_args(self):
         """Process command line arguments"""
-        # Check for headless flag
-        if "--headless" in sys.argv:
-            self.perform_headless_login()
-            sys.exit(0)
+        # --headless never gets here, headless_login.py handles it before any UI loads
         
         # Check if credentials are needed flag
         self.needs_credentials = "--needs-credentials" in sys.argv
@@ -135,6 +150,7 @@ class SimulanisLoginApp(ctk.CTk):
                 
             # Load mini UI assets
             self.load_mini_icons()
+            startup_trace.mark("assets")
             
             # Setup mini UI components
             self.setup_mini_gui()
@@ -147,6 +163,7 @@ class SimulanisLoginApp(ctk.CTk):
             # Load full UI assets
             self.load_branding()
             self.load_icons()
+            startup_trace.mark("assets")
             
             # Setup full UI components
             self.setup_full_gui()
@@ -324,6 +341,9 @@ class SimulanisLoginApp(ctk.CTk):
             else:
                 icon_image = Image.open(icon_path)
             
+            # Only needed once the window goes to the tray
+            import pystray
+            
             # Define menu items and actions
             menu = (
                 pystray.MenuItem('Show', self.on_tray_show),
@@ -361,6 +381,8 @@ class SimulanisLoginApp(ctk.CTk):
         if self.tray_icon is not None:
             self.tray_icon.stop()
             self.tray_icon = None
+        # Quit any warm browsers kept by the login manager
+        self.login_mgr.close()
         # Actually destroy the window and exit
         self.destroy()
     
@@ -459,15 +481,11 @@ class SimulanisLoginApp(ctk.CTk):
                     self.connect_button.grid(row=1, column=0, padx=5, pady=(0, 0), sticky="")
                     self.update_status("Click Connect to log in")
     
-    def perform_headless_login(self):
-        """Perform login in headless mode"""
-        # Create login manager in headless mode
-        login_mgr = LoginManager(headless=True)
-        # Perform the login
-        login_mgr.perform_login()
-    
     def perform_login(self, username=None, password=None):
-        """Perform the login operation"""
+        """Start the login operation, off the Tk thread (no-op while one is running)"""
+        if self.background_login.running:
+            return
+        
         # Different UI updates based on mode
         if self.is_mini:
             # Hide connect button if it exists
@@ -498,9 +516,12 @@ class SimulanisLoginApp(ctk.CTk):
                 username = self.username_entry.get()
                 password = self.password_entry.get()
         
-        # Perform the login through the manager
-        result = self.login_mgr.perform_login(username, password, self.headless_mode_var.get())
-        
+        # The login may wait for another process's login, so the window must keep running meanwhile
+        self.background_login.start(self.login_mgr, lambda result: self.finish_login(result, username, password),
+                                    username, password, self.headless_mode_var.get())
+    
+    def finish_login(self, result, username=None, password=None):
+        """Show the result of a login started by perform_login (Tk loop)"""
         if result['success']:
             # Success - update UI for connection
             self.is_connected = True
@@ -552,8 +573,6 @@ class SimulanisLoginApp(ctk.CTk):
                 self.update_status(f"Connection failed: {result['message']}", None)
             else:
                 self.update_status("Connection failed", None)
-        
-        return result
     
     def apply_modern_window_style(self):
         """Apply modern Windows 11 style with rounded corners and shadow"""
@@ -818,6 +837,32 @@ class SimulanisLoginApp(ctk.CTk):
             if hasattr(self, 'username_entry'):
                 self.username_entry.focus_set()
     
+    def on_session_event(self, event):
+        """Session heartbeat result, called from the heartbeat thread"""
+        # Widgets may only be touched from the Tk loop
+        try:
+            self.after(0, lambda: self.show_session_state(event['state']))
+        except Exception as e:
+            self.log(f"Could not show session state: {str(e)}")
+    
+    def show_session_state(self, state):
+        """Reflect a heartbeat result in the UI"""
+        if state == HEARTBEAT_ALIVE:
+            self.is_connected = True
+            if self.is_mini and hasattr(self, 'status_label'):
+                self.status_label.configure(text_color=("#2CC985", "#2FA572"))  # Green text color
+            return
+        
+        if self.is_mini:
+            self.update_ui_for_disconnection()
+        elif hasattr(self, 'login_button'):
+            self.login_button.configure(state="normal")
+        self.is_connected = False
+        if state == HEARTBEAT_SESSION_LOST:
+            self.update_status("Session expired - please log in again")
+        else:
+            self.update_status("Network unreachable")
+    
     def update_ui_for_disconnection(self):
         """Update mini UI elements for disconnected state"""
         # Only applicable for mini UI mode
@@ -1138,12 +1183,6 @@ class SimulanisLoginApp(ctk.CTk):
 
 # Main execution
 if __name__ == "__main__":
-    # Check for headless mode
-    if "--headless" in sys.argv:
-        # Just create login manager in headless mode and perform login
-        login_mgr = LoginManager(headless=True)
-        login_mgr.perform_login()
-    else:
-        # Create the main application
-        app = SimulanisLoginApp()
-        app.mainloop() 
\ No newline at end of file
+    # Create the main application (--headless was handed to headless_login.py above)
+    app = SimulanisLoginApp()
+    app.mainloop() 
\ No newline at end of file
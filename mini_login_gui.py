@@ -1,32 +1,41 @@
+# Startup milestones for benchmarks/cold_start.py (no-op unless enabled)
+import startup_trace
+startup_trace.mark("interpreter")
+
+import sys
+
+# Headless runs never need Tk, so hand over before importing it
+if __name__ == "__main__" and "--headless" in sys.argv:
+    import headless_login
+    sys.exit(headless_login.main())
+
 import tkinter as tk
 from tkinter import ttk
 import customtkinter as ctk
-from PIL import Image, ImageTk, ImageOps
+from PIL import Image, ImageTk
 import json
 import os
-import keyring
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import time
-import sys
 from pathlib import Path
-import requests
 import math
 import subprocess
 import threading
-import pystray
 import ctypes
 
 # Import the login core
-from login_core import LoginManager
+from login_core import LoginManager, PORTAL_ONLINE, PORTAL_NEEDS_LOGIN, PORTAL_UNREACHABLE
+from background_login import BackgroundLogin
+from heartbeat import HEARTBEAT_ALIVE, HEARTBEAT_SESSION_LOST
+import profiling
+
+startup_trace.mark("imports")
 
 # --- Main Application Window ---
 class MiniLoginApp(ctk.CTk):
+    @profiling.profiled
     def __init__(self, headless=False):
         super().__init__()
+        startup_trace.mark("tk_init")
         
         # Application constants
         self.APP_NAME = "Simulanis Login Mini"
@@ -68,11 +77,21 @@ class MiniLoginApp(ctk.CTk):
         self.config_dir = str(Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent)
         self.log(f"Using config directory: {self.config_dir}")
         
-        # Create login manager
-        self.login_mgr = LoginManager(headless=headless, ui_callback=self.update_status, config_dir=self.config_dir)
+        # Create login manager; logins run on a worker thread, its status updates are shown on the Tk loop
+        self.background_login = BackgroundLogin(self, self.update_status)
+        self.login_mgr = LoginManager(headless=headless, ui_callback=self.background_login.status_callback,
+                                      config_dir=self.config_dir)
+        
+        # Retries of transient failures are scheduled on the Tk loop so the window stays responsive
+        self.retry_scheduler = self.login_mgr.create_retry_scheduler()
+        self._retry_after_id = None
+        
+        # The session heartbeat reports drops after a successful login
+        self.login_mgr.add_session_listener(self.on_session_event)
         
         # Load icons
         self.load_icons()
+        startup_trace.mark("assets")
         
         # Setup UI
         self.setup_mini_gui()
@@ -106,6 +125,7 @@ class MiniLoginApp(ctk.CTk):
         
         # Load saved configuration (still needed for auto-login check)
         self.load_config()
+        startup_trace.mark("config")
         
         # Update UI variables from loaded config
         self.remember_me_var.set(self.login_mgr.config.get('remember_me', False))
@@ -121,6 +141,45 @@ class MiniLoginApp(ctk.CTk):
             self.connect_button.grid(row=1, column=0, padx=5, pady=(0, 0), sticky="")
             # And update status to hint user
             self.update_status("Click Connect to log in")
+            # Tell the user straight away whether a login is needed at all
+            if self.login_mgr.preflight:
+                self.start_portal_probe()
+        
+        # Record when the window is first shown
+        self.bind("<Map>", lambda event: startup_trace.mark("first_window"), add="+")
+
+    def start_portal_probe(self):
+        """Run the pre-flight probe in the background and show its result as soon as it arrives"""
+        probe = {}
+        
+        def run_probe():
+            try:
+                probe['state'] = self.login_mgr.check_portal_state()
+            except Exception as e:
+                self.log(f"Pre-flight probe failed: {str(e)}")
+        
+        thread = threading.Thread(target=run_probe, daemon=True)
+        thread.start()
+        self.after(20, lambda: self.show_portal_state(thread, probe))
+    
+    def show_portal_state(self, thread, probe):
+        """Poll the probe thread from the Tk loop and update the status once it's done"""
+        if thread.is_alive():
+            self.after(20, lambda: self.show_portal_state(thread, probe))
+            return
+        
+        # The user may have clicked Connect in the meantime
+        if not self.connect_button.winfo_ismapped():
+            return
+        
+        state = probe.get('state')
+        if state == PORTAL_ONLINE:
+            self.update_ui_for_connection()
+            self.update_status("Already online")
+        elif state == PORTAL_UNREACHABLE:
+            self.update_status("Portal unreachable")
+        elif state == PORTAL_NEEDS_LOGIN:
+            self.update_status("Portal ready - click Connect")
 
     def position_window_top_right(self):
         """Position the window in the top right corner of the screen"""
@@ -308,6 +367,9 @@ class MiniLoginApp(ctk.CTk):
                 self.progress_bar.grid(row=1, column=0, padx=10, pady=(35, 5), sticky="s")
         
         if username and password:
+            # A manual connect starts a fresh round of retries
+            self.cancel_retry()
+            self.retry_scheduler.reset()
             self.perform_login(username, password)
         else:
             # No credentials available, open the full auto login GUI instead of showing dialog
@@ -583,7 +645,10 @@ class MiniLoginApp(ctk.CTk):
                 pass  # Some platforms might not support changing the tooltip
 
     def perform_login(self, username=None, password=None):
-        """Perform login using the login manager"""
+        """Start a login through the login manager, off the Tk thread (no-op while one is running)"""
+        if self.background_login.running:
+            return
+        
         # Hide connect button immediately if it exists
         if hasattr(self, 'connect_button') and self.connect_button.winfo_ismapped():
             self.connect_button.grid_remove()
@@ -591,10 +656,16 @@ class MiniLoginApp(ctk.CTk):
         # Ensure status label shows connecting message
         self.update_status("Connecting...", 10)
             
-        # Perform the login through the manager
-        result = self.login_mgr.perform_login(username, password, self.headless_mode_var.get())
-        
+        # The login may wait for another process's login, so the window must keep running meanwhile
+        self._retry_after_id = None
+        self.background_login.start(self.login_mgr, lambda result: self.finish_login(result, username, password),
+                                    username, password, self.headless_mode_var.get())
+    
+    def finish_login(self, result, username=None, password=None):
+        """Show the result of a login started by perform_login (Tk loop)"""
         if result['success']:
+            self.retry_scheduler.reset()
+            
             # Success - update UI for connection
             self.update_ui_for_connection()
             
@@ -616,7 +687,39 @@ class MiniLoginApp(ctk.CTk):
             else:
                 self.update_status("Connection failed", None)
             
-        return result
+            # Transient failures (e.g. the network isn't up yet at boot) are retried with backoff
+            delay = self.retry_scheduler.next_delay(result)
+            if delay is not None:
+                self.update_status(f"Connection failed, retrying in {delay:.0f}s", None)
+                self._retry_after_id = self.after(int(delay * 1000), lambda: self.perform_login(username, password))
+    
+    def on_session_event(self, event):
+        """Session heartbeat result, called from the heartbeat thread"""
+        # Widgets may only be touched from the Tk loop
+        try:
+            self.after(0, lambda: self.show_session_state(event['state']))
+        except Exception as e:
+            self.log(f"Could not show session state: {str(e)}")
+    
+    def show_session_state(self, state):
+        """Reflect a heartbeat result in the UI"""
+        if state == HEARTBEAT_ALIVE:
+            if not self.is_connected:
+                self.update_ui_for_connection()
+            return
+        
+        if self.is_connected:
+            self.update_ui_for_disconnection()
+        if state == HEARTBEAT_SESSION_LOST:
+            self.update_status("Session expired - click Connect")
+        else:
+            self.update_status("Network unreachable")
+    
+    def cancel_retry(self):
+        """Cancel a scheduled login retry, if any"""
+        if self._retry_after_id is not None:
+            self.after_cancel(self._retry_after_id)
+            self._retry_after_id = None
 
     def open_full_gui(self, needs_credentials=False):
         """Open the full Auto Login GUI as a separate process"""
@@ -690,6 +793,12 @@ class MiniLoginApp(ctk.CTk):
             if os.path.exists("mini_ui_handle.txt"):
                 os.remove("mini_ui_handle.txt")
                 self.log("Removed window handle file")
+            
+            # Stop pending retries and quit any warm browsers kept by the login manager
+            if hasattr(self, '_retry_after_id'):
+                self.cancel_retry()
+            if hasattr(self, 'login_mgr'):
+                self.login_mgr.close()
         except Exception as e:
             self.log(f"Error during cleanup: {str(e)}")
     
@@ -728,6 +837,9 @@ class MiniLoginApp(ctk.CTk):
             else:
                 icon_image = Image.open(icon_path)
             
+            # Only needed once the window goes to the tray
+            import pystray
+            
             # Define menu items and actions
             menu = (
                 pystray.MenuItem('Show', self.on_tray_show),
@@ -944,11 +1056,7 @@ foreach ($window in $windows) {
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    # Check for headless mode argument
-    headless_mode = '--headless' in sys.argv
-    
-    app = MiniLoginApp(headless=headless_mode)
-    if not headless_mode:
-        app.mainloop()
-    # Headless mode already calls perform_login in init
+    # --headless was handed to headless_login.py above
+    app = MiniLoginApp()
+    app.mainloop()
  
\ No newline at end of file
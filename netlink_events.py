@@ -0,0 +1,296 @@
+"""
+Simulanis Login Network Events
+
+Tells the login daemon about network changes the moment the kernel sees
+them instead of it finding out on its next check. NetlinkEventSource
+listens on a Linux rtnetlink socket (link and IPv4/IPv6 address groups)
+and reports cable plugs and unplugs, Wi-Fi joins and new DHCP addresses;
+FakeEventSource has the same interface and emits whatever a test or
+benchmark tells it to.
+
+Event sources call their callback with a dict:
+    kind (str): EVENT_LINK_UP, EVENT_LINK_DOWN, EVENT_ADDRESS_ADDED or EVENT_ADDRESS_REMOVED
+    interface (str): Interface name, e.g. "eth0"
+    time (float): time.monotonic() when the event was read
+"""
+
+import os
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+
+# Event kinds
+EVENT_LINK_UP = "link_up"
+EVENT_LINK_DOWN = "link_down"
+EVENT_ADDRESS_ADDED = "address_added"
+EVENT_ADDRESS_REMOVED = "address_removed"
+
+# rtnetlink constants from <linux/netlink.h>, <linux/rtnetlink.h> and <linux/if.h>
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+IFLA_IFNAME = 3
+IFF_UP = 0x1
+IFF_LOOPBACK = 0x8
+IFF_RUNNING = 0x40
+RT_SCOPE_UNIVERSE = 0
+
+NLMSG_HEADER = struct.Struct("=IHHII")   # length, type, flags, sequence, port id
+IFINFOMSG = struct.Struct("=BxHiII")     # family, device type, index, flags, change mask
+IFADDRMSG = struct.Struct("=BBBBi")      # family, prefix length, flags, scope, index
+RTATTR_HEADER = struct.Struct("=HH")     # length, type
+
+RECEIVE_BUFFER = 65536
+
+
+def netlink_supported():
+    """Whether this system has rtnetlink sockets (Linux only)"""
+    return sys.platform.startswith("linux") and hasattr(socket, "AF_NETLINK")
+
+
+def align(length):
+    """Netlink messages and attributes are padded to 4 bytes"""
+    return (length + 3) & ~3
+
+
+def parse_attributes(data):
+    """Route attributes as {type: payload}"""
+    attributes = {}
+    offset = 0
+    while offset + RTATTR_HEADER.size <= len(data):
+        length, kind = RTATTR_HEADER.unpack_from(data, offset)
+        if length < RTATTR_HEADER.size:
+            break
+        attributes[kind] = data[offset + RTATTR_HEADER.size:offset + length]
+        offset += align(length)
+    return attributes
+
+
+def interface_name(index):
+    try:
+        return socket.if_indextoname(index)
+    except OSError:
+        return f"if{index}"
+
+
+class EventSource:
+    """Shared state of the event sources: which interfaces are up, and who to tell"""
+
+    def __init__(self, log=None):
+        """
+        Initialize the event source
+
+        Args:
+            log (function, optional): Logging function, signature: log(message)
+        """
+        self.log = log or (lambda message: None)
+        self.callback = None
+        # Interfaces (other than loopback) whose link is up, by index
+        self.links_up = {}
+        self.loopback_indexes = set()
+
+    @property
+    def link_up(self):
+        """Whether any non-loopback interface has a link"""
+        return bool(self.links_up)
+
+    def start(self, callback):
+        """
+        Start delivering events
+
+        Args:
+            callback (function): Called with every event dict, from the source's thread
+        """
+        self.callback = callback
+
+    def stop(self):
+        """Stop delivering events"""
+        self.callback = None
+
+    def emit(self, kind, interface):
+        event = {'kind': kind, 'interface': interface, 'time': time.monotonic()}
+        callback = self.callback
+        if callback is not None:
+            callback(event)
+        return event
+
+    def update_link(self, index, name, running):
+        """Record a link state and emit an event if it changed"""
+        was_running = index in self.links_up
+        if running and not was_running:
+            self.links_up[index] = name
+            self.emit(EVENT_LINK_UP, name)
+        elif not running and was_running:
+            del self.links_up[index]
+            self.emit(EVENT_LINK_DOWN, name)
+
+
+class NetlinkEventSource(EventSource):
+    """Link and address changes read from a Linux rtnetlink socket"""
+
+    GROUPS = RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR
+
+    def __init__(self, log=None):
+        super().__init__(log)
+        self._socket = None
+        self._thread = None
+        self._wake_read = self._wake_write = None
+
+    def start(self, callback):
+        """
+        Subscribe to the kernel's notifications and start the reader thread
+
+        The current link state is read first (without emitting events), so
+        link_up is right as soon as this returns.
+
+        Raises:
+            OSError: If the netlink socket cannot be opened
+        """
+        self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        self._socket.bind((0, self.GROUPS))
+        self.read_initial_links()
+        super().start(callback)
+        # Written to by stop() to wake the reader thread out of select
+        self._wake_read, self._wake_write = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="netlink-events", daemon=True)
+        self._thread.start()
+        self.log(f"Listening for network changes, links up: {', '.join(self.links_up.values()) or 'none'}")
+
+    def stop(self):
+        super().stop()
+        if self._thread is not None:
+            os.write(self._wake_write, b"x")
+            self._thread.join()
+            self._thread = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        if self._wake_read is not None:
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+            self._wake_read = self._wake_write = None
+
+    def read_initial_links(self):
+        """Ask the kernel for every link and record which are up"""
+        request = IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+        header = NLMSG_HEADER.pack(NLMSG_HEADER.size + len(request), RTM_GETLINK,
+                                   NLM_F_REQUEST | NLM_F_DUMP, 1, 0)
+        self._socket.send(header + request)
+        while True:
+            if not self.handle_messages(self._socket.recv(RECEIVE_BUFFER)):
+                break
+
+    def _run(self):
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._socket, selectors.EVENT_READ)
+            selector.register(self._wake_read, selectors.EVENT_READ)
+            while self.callback is not None:
+                ready = [key.fileobj for key, _ in selector.select()]
+                if self._wake_read in ready:
+                    return
+                try:
+                    self.handle_messages(self._socket.recv(RECEIVE_BUFFER))
+                except Exception as e:
+                    # One unparsable message shouldn't end the subscription
+                    self.log(f"Could not read network event: {str(e)}")
+
+    def handle_messages(self, data):
+        """
+        Turn the messages in one netlink datagram into events
+
+        Returns:
+            bool: False once the end of a dump was reached
+        """
+        offset = 0
+        while offset + NLMSG_HEADER.size <= len(data):
+            length, kind, _, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+            if length < NLMSG_HEADER.size:
+                break
+            payload = data[offset + NLMSG_HEADER.size:offset + length]
+            offset += align(length)
+
+            if kind in (NLMSG_DONE, NLMSG_ERROR):
+                return False
+            if kind in (RTM_NEWLINK, RTM_DELLINK):
+                self.handle_link(kind, payload)
+            elif kind in (RTM_NEWADDR, RTM_DELADDR):
+                self.handle_address(kind, payload)
+        return True
+
+    def handle_link(self, kind, payload):
+        _, _, index, flags, _ = IFINFOMSG.unpack_from(payload)
+        if flags & IFF_LOOPBACK:
+            self.loopback_indexes.add(index)
+            return
+        name = parse_attributes(payload[IFINFOMSG.size:]).get(IFLA_IFNAME, b"").rstrip(b"\0").decode(
+            errors="replace") or interface_name(index)
+        running = kind == RTM_NEWLINK and flags & IFF_UP and flags & IFF_RUNNING
+        self.update_link(index, name, bool(running))
+
+    def handle_address(self, kind, payload):
+        _, _, _, scope, index = IFADDRMSG.unpack_from(payload)
+        # Link-local and host addresses come and go with the link itself
+        if scope != RT_SCOPE_UNIVERSE or index in self.loopback_indexes:
+            return
+        self.emit(EVENT_ADDRESS_ADDED if kind == RTM_NEWADDR else EVENT_ADDRESS_REMOVED, interface_name(index))
+
+
+class FakeEventSource(EventSource):
+    """Event source driven by hand, for tests and benchmarks"""
+
+    def __init__(self, link_up=True, log=None):
+        """
+        Initialize the fake source
+
+        Args:
+            link_up (bool, optional): Whether "eth0" starts with a link
+            log (function, optional): Logging function, signature: log(message)
+        """
+        super().__init__(log)
+        self.indexes = {}
+        if link_up:
+            self.links_up[self.index_of("eth0")] = "eth0"
+
+    def index_of(self, interface):
+        return self.indexes.setdefault(interface, len(self.indexes) + 2)
+
+    def plug(self, interface="eth0"):
+        """Simulate a cable plug or Wi-Fi join"""
+        self.update_link(self.index_of(interface), interface, True)
+
+    def unplug(self, interface="eth0"):
+        """Simulate a cable unplug or Wi-Fi loss"""
+        self.update_link(self.index_of(interface), interface, False)
+
+    def new_address(self, interface="eth0"):
+        """Simulate a DHCP lease or renewal"""
+        self.emit(EVENT_ADDRESS_ADDED, interface)
+
+    def remove_address(self, interface="eth0"):
+        """Simulate a lease expiring"""
+        self.emit(EVENT_ADDRESS_REMOVED, interface)
+
+
+def create_event_source(log=None):
+    """
+    The best event source for this system
+
+    Returns:
+        EventSource: A NetlinkEventSource on Linux, None elsewhere
+    """
+    if netlink_supported():
+        return NetlinkEventSource(log)
+    return None
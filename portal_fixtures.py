@@ -0,0 +1,357 @@
+"""
+Simulanis Login Portal Fixtures
+
+Records what the captive portal answers to a login (every request of the
+redirect chain with its status, Location header and HTML) into a compact
+gzipped JSON archive, and replays those recordings in memory. Every fixture
+is checked twice: its final page goes straight into classify_login_outcome,
+which takes microseconds, so thousands of outcome regressions run in well
+under a second, and its whole chain is served to the real HttpLoginBackend
+through a transport adapter, so form parsing and redirect handling are
+covered too (--classifier-only skips that slower part).
+
+Credentials never reach the archive: the username and password (also URL
+encoded) are replaced with placeholders, the portal's address with another
+one, and cookies are not recorded.
+
+Usage:
+    python portal_fixtures.py record --archive portal_fixtures.json.gz --name auth_failed \\
+        --username USER --password WRONG --expect auth_failed
+    python portal_fixtures.py list --archive portal_fixtures.json.gz
+    python portal_fixtures.py replay --archive portal_fixtures.json.gz --repeat 1000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import quote, quote_plus, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from http_backend import HttpLoginBackend
+from login_core import LoginManager, classify_login_outcome
+
+ARCHIVE_VERSION = 1
+
+# Placeholders for what must not be stored, filled in again on replay
+USERNAME_PLACEHOLDER = "{{username}}"
+PASSWORD_PLACEHOLDER = "{{password}}"
+PORTAL_PLACEHOLDER = "{{portal}}"
+
+# Response headers worth keeping, everything else (cookies in particular) is dropped
+RECORDED_HEADERS = ("Location", "Content-Type", "Refresh")
+
+# Where replayed logins pretend the portal is, and who they log in as
+REPLAY_ORIGIN = "https://portal.replay"
+REPLAY_USERNAME = "replay.user"
+REPLAY_PASSWORD = "replay-password"
+
+
+class ReplayMismatchError(Exception):
+    """Raised when a replayed login makes a request the recording doesn't have"""
+
+
+def portal_origin(url):
+    """scheme://host[:port] of a URL"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class FixtureRecorder:
+    """Collect the scrubbed responses a requests session receives"""
+
+    def __init__(self, target_url, username, password):
+        """
+        Initialize the recorder
+
+        Args:
+            target_url (str): Login page URL, its origin is replaced with PORTAL_PLACEHOLDER
+            username (str): Username to scrub
+            password (str): Password to scrub
+        """
+        self.origin = portal_origin(target_url)
+        self.patterns = []
+        # The password first, in case it contains the username
+        for secret, placeholder in ((password, PASSWORD_PLACEHOLDER), (username, USERNAME_PLACEHOLDER)):
+            if not secret:
+                continue
+            variants = sorted({secret, quote(secret, safe=""), quote_plus(secret)}, key=len, reverse=True)
+            # Only whole occurrences, so a short secret doesn't eat into words like "text/html"
+            pattern = r"(?<![A-Za-z0-9])(?:" + "|".join(map(re.escape, variants)) + r")(?![A-Za-z0-9])"
+            self.patterns.append((re.compile(pattern), placeholder))
+        self.exchanges = []
+
+    def attach(self, session):
+        """Record every response the session receives from now on"""
+        session.hooks['response'].append(self.record)
+
+    def scrub(self, text):
+        """Replace credentials (plain and URL encoded) and the portal address with placeholders"""
+        for pattern, placeholder in self.patterns:
+            text = pattern.sub(placeholder, text)
+        return text.replace(self.origin, PORTAL_PLACEHOLDER)
+
+    def record(self, response, *args, **kwargs):
+        self.exchanges.append({
+            'method': response.request.method,
+            'url': self.scrub(response.request.url),
+            'status': response.status_code,
+            'headers': {name: self.scrub(response.headers[name])
+                        for name in RECORDED_HEADERS if name in response.headers},
+            'body': self.scrub(response.text)
+        })
+        return response
+
+
+def record_login(target_url, username, password, name, expected=None, timeout=None):
+    """
+    Log in once over HTTP and turn the portal's answers into a fixture
+
+    Args:
+        target_url (str): Login page URL
+        username (str): Username to log in with
+        password (str): Password to log in with
+        name (str): Fixture name, e.g. "auth_failed"
+        expected (str, optional): OUTCOME_* the login should be classified as,
+                                  defaults to what it is classified as now
+        timeout (tuple, optional): (connect, read) timeouts in seconds
+
+    Returns:
+        dict: Fixture with keys name, outcome, classified, target_url, recorded_at,
+              final (url, page_source and visited as classified) and exchanges
+    """
+    backend = HttpLoginBackend(target_url, timeout=timeout)
+    recorder = FixtureRecorder(target_url, username, password)
+    recorder.attach(backend.session)
+    try:
+        page = backend.submit(username, password)
+    finally:
+        backend.close()
+
+    classified = classify_login_outcome(page['url'], page['page_source'], username, target_url, page['visited'])
+    return {
+        'name': name,
+        'outcome': expected or classified,
+        'classified': classified,
+        'target_url': recorder.scrub(target_url),
+        'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'final': {
+            'url': recorder.scrub(page['url']),
+            'page_source': recorder.scrub(page['page_source']),
+            'visited': [recorder.scrub(url) for url in page['visited']]
+        },
+        'exchanges': recorder.exchanges
+    }
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport adapter that answers from a fixture instead of the network"""
+
+    def __init__(self, exchanges, substitutions):
+        """
+        Initialize the adapter
+
+        Args:
+            exchanges (list): Recorded exchanges, served in order
+            substitutions (dict): Placeholder -> value to fill into URLs, headers and bodies
+        """
+        super().__init__()
+        self.exchanges = exchanges
+        self.substitutions = substitutions
+        self.position = 0
+
+    def expand(self, text):
+        for placeholder, value in self.substitutions.items():
+            text = text.replace(placeholder, value)
+        return text
+
+    def send(self, request, **kwargs):
+        if self.position >= len(self.exchanges):
+            raise ReplayMismatchError(f"Unexpected request {request.method} {request.url}")
+        exchange = self.exchanges[self.position]
+        self.position += 1
+
+        # The login must walk the same chain; queries (tokens) may differ
+        recorded_url = self.expand(exchange['url'])
+        if request.method != exchange['method'] or urlsplit(request.url).path != urlsplit(recorded_url).path:
+            raise ReplayMismatchError(f"Expected {exchange['method']} {recorded_url}, "
+                                      f"got {request.method} {request.url}")
+
+        response = requests.Response()
+        response.status_code = exchange['status']
+        response.headers = CaseInsensitiveDict({name: self.expand(value)
+                                                for name, value in exchange['headers'].items()})
+        response._content = self.expand(exchange['body']).encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class FixtureReplayer:
+    """Replay fixtures through HttpLoginBackend and classify_login_outcome"""
+
+    def __init__(self, origin=REPLAY_ORIGIN, username=REPLAY_USERNAME, password=REPLAY_PASSWORD):
+        """
+        Initialize the replayer
+
+        Args:
+            origin (str, optional): Portal address to fill in for PORTAL_PLACEHOLDER
+            username (str, optional): Username the replayed logins use
+            password (str, optional): Password the replayed logins use
+        """
+        self.username = username
+        self.password = password
+        self.substitutions = {PORTAL_PLACEHOLDER: origin, USERNAME_PLACEHOLDER: username,
+                              PASSWORD_PLACEHOLDER: password}
+
+    def expand(self, text):
+        for placeholder, value in self.substitutions.items():
+            text = text.replace(placeholder, value)
+        return text
+
+    def classify(self, fixture):
+        """
+        Classify a fixture's final page, without going through the backend
+
+        Returns:
+            str: OUTCOME_* the page is classified as now
+        """
+        final = fixture['final']
+        return classify_login_outcome(self.expand(final['url']), self.expand(final['page_source']), self.username,
+                                      self.expand(fixture['target_url']),
+                                      [self.expand(url) for url in final['visited']])
+
+    def replay(self, fixture):
+        """
+        Run one recorded login through HttpLoginBackend in memory
+
+        Returns:
+            str: OUTCOME_* the login is classified as now
+
+        Raises:
+            ReplayMismatchError: If the backend's requests no longer match the recording
+        """
+        target_url = self.expand(fixture['target_url'])
+        backend = HttpLoginBackend(target_url)
+        # Nothing from the environment (proxies, CA bundles) applies to replayed requests
+        backend.session.trust_env = False
+        adapter = ReplayAdapter(fixture['exchanges'], self.substitutions)
+        backend.session.mount("https://", adapter)
+        backend.session.mount("http://", adapter)
+        try:
+            page = backend.submit(self.username, self.password)
+        finally:
+            backend.close()
+        return classify_login_outcome(page['url'], page['page_source'], self.username, target_url, page['visited'])
+
+    def check(self, fixtures, repeat=1, backend=True):
+        """
+        Replay fixtures and compare against their expected outcomes
+
+        Args:
+            fixtures (list): Fixtures from load_archive
+            repeat (int, optional): Classify every fixture this many times
+            backend (bool, optional): Also replay every fixture once through HttpLoginBackend
+
+        Returns:
+            dict: Summary with keys classified, replayed, failures ([(name, stage, expected, got)])
+                  and seconds
+        """
+        failures = []
+        started = time.perf_counter()
+        stages = [("classifier", self.classify, repeat)]
+        if backend:
+            stages.append(("backend", self.replay, 1))
+        for stage, run, times in stages:
+            for _ in range(times):
+                for fixture in fixtures:
+                    try:
+                        outcome = run(fixture)
+                    except Exception as e:
+                        outcome = f"error: {str(e)}"
+                    if outcome != fixture['outcome']:
+                        failures.append((fixture['name'], stage, fixture['outcome'], outcome))
+        return {
+            'classified': repeat * len(fixtures),
+            'replayed': len(fixtures) if backend else 0,
+            'failures': failures,
+            'seconds': time.perf_counter() - started
+        }
+
+
+def load_archive(path):
+    """Fixtures stored in an archive (empty list if it doesn't exist yet)"""
+    if not os.path.exists(path):
+        return []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)['fixtures']
+
+
+def save_archive(path, fixtures):
+    """Write fixtures to an archive, replacing its contents"""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump({'version': ARCHIVE_VERSION, 'fixtures': fixtures}, f, separators=(",", ":"))
+
+
+def add_fixture(path, fixture):
+    """Add a fixture to an archive, replacing one with the same name"""
+    fixtures = [f for f in load_archive(path) if f['name'] != fixture['name']]
+    fixtures.append(fixture)
+    save_archive(path, fixtures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay captive portal login fixtures")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="Log in once and store the portal's answers")
+    record.add_argument("--archive", default="portal_fixtures.json.gz")
+    record.add_argument("--name", required=True, help="Fixture name, e.g. success or auth_failed")
+    record.add_argument("--url", default=LoginManager.DEFAULT_TARGET_URL, help="Login page URL")
+    record.add_argument("--username", default=os.environ.get("SIMULANIS_USERNAME"))
+    record.add_argument("--password", default=os.environ.get("SIMULANIS_PASSWORD"))
+    record.add_argument("--expect", help="Outcome the login should be classified as")
+
+    listing = subparsers.add_parser("list", help="Show the fixtures in an archive")
+    listing.add_argument("--archive", default="portal_fixtures.json.gz")
+
+    replay = subparsers.add_parser("replay", help="Check every fixture against the current code")
+    replay.add_argument("--archive", default="portal_fixtures.json.gz")
+    replay.add_argument("--repeat", type=int, default=1, help="Classify every fixture this many times")
+    replay.add_argument("--classifier-only", action="store_true", help="Don't replay through HttpLoginBackend")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        if not args.username or not args.password:
+            parser.error("--username and --password (or SIMULANIS_USERNAME/SIMULANIS_PASSWORD) are required")
+        fixture = record_login(args.url, args.username, args.password, args.name, args.expect)
+        add_fixture(args.archive, fixture)
+        print(f"Recorded {fixture['name']}: {len(fixture['exchanges'])} responses, "
+              f"classified as {fixture['classified']}, expected {fixture['outcome']}")
+    elif args.command == "list":
+        for fixture in load_archive(args.archive):
+            print(f"{fixture['name']}: {fixture['outcome']} ({len(fixture['exchanges'])} responses, "
+                  f"recorded {fixture['recorded_at']})")
+    else:
+        fixtures = load_archive(args.archive)
+        summary = FixtureReplayer().check(fixtures, args.repeat, backend=not args.classifier_only)
+        for name, stage, expected, got in sorted(set(summary['failures'])):
+            print(f"FAILED {name} ({stage}): expected {expected}, got {got}", file=sys.stderr)
+        print(f"Classified {summary['classified']} and replayed {summary['replayed']} logins "
+              f"from {len(fixtures)} fixtures in {summary['seconds']:.3f} s, {len(summary['failures'])} failed")
+        if summary['failures']:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
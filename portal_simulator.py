@@ -0,0 +1,330 @@
+"""
+Simulanis Login Portal Simulator
+
+A local stand-in for the Sophos-style captive portal, so logins can be
+developed and benchmarked without 192.168.1.9. It serves the /userlogin/
+form, redirects through /userSense, answers with the portal's failure and
+already-logged-in messages and sends successful logins on to simulanis.com.
+Latency, error rate and session expiry can be tuned.
+
+Usage:
+    python portal_simulator.py --port 8443 --user demo:demo --latency 0.05
+
+Then point LoginManager at it with "target_url" in config.json, the
+SIMULANIS_TARGET_URL environment variable or LoginManager(target_url=...).
+"""
+
+import argparse
+import html
+import os
+import random
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse, urlencode
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Captive Portal</title></head>
+<body>
+<div class="message">{message}</div>
+<form method="post" action="/userlogin/" name="frmHTTPClientLogin">
+    <input type="hidden" name="mode" value="191">
+    <input type="text" id="user" name="username" autocomplete="off">
+    <input type="password" id="passwd" name="password">
+    <input type="submit" id="submitbtn" name="loginbutton" value="Login">
+</form>
+</body>
+</html>
+"""
+
+
+def generate_self_signed_certificate(directory, hostname="localhost"):
+    """
+    Create a self-signed certificate with openssl
+
+    Returns:
+        tuple: (cert_file, key_file) paths
+
+    Raises:
+        FileNotFoundError: If openssl is not installed
+    """
+    openssl = shutil.which("openssl")
+    if not openssl:
+        raise FileNotFoundError("openssl is needed to generate the simulator certificate")
+
+    cert_file = os.path.join(directory, "portal_cert.pem")
+    key_file = os.path.join(directory, "portal_key.pem")
+    subprocess.run([
+        openssl, "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+        "-keyout", key_file, "-out", cert_file, "-days", "30",
+        "-subj", f"/CN={hostname}",
+        "-addext", f"subjectAltName=DNS:{hostname},IP:127.0.0.1"
+    ], check=True, capture_output=True)
+    return cert_file, key_file
+
+
+class PortalSimulator:
+    """Captive portal simulator running in a background thread"""
+
+    DEFAULT_USERS = {"demo": "demo"}
+    DEFAULT_SUCCESS_URL = "https://www.simulanis.com/"
+
+    def __init__(self, host="127.0.0.1", port=0, users=None, latency=0, error_rate=0, session_ttl=None,
+                 redirect_loop=False, success_url=None, https=True, cert_file=None, key_file=None,
+                 session_key="client"):
+        """
+        Initialize the simulator (call start() to serve)
+
+        Args:
+            host (str, optional): Interface to listen on
+            port (int, optional): Port to listen on, 0 picks a free one
+            users (dict, optional): Accepted credentials as {username: password}
+            latency (float or tuple, optional): Delay added to every response in seconds,
+                                                or a (min, max) range to draw from
+            error_rate (float, optional): Fraction of requests answered with a 503
+            session_ttl (float, optional): Seconds a login stays valid, None for forever
+            redirect_loop (bool, optional): Send every login back to the form without a message
+            success_url (str, optional): Where successful logins are redirected
+            https (bool, optional): Serve HTTPS with a self-signed certificate
+            cert_file (str, optional): Certificate to use instead of generating one
+            key_file (str, optional): Private key matching cert_file
+            session_key (str, optional): "client" keeps one session per client IP like the real portal,
+                                         "user" one per username, so many clients can log in from one
+                                         machine (generate_204 then never reports a client as online)
+        """
+        self.users = dict(self.DEFAULT_USERS if users is None else users)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.redirect_loop = redirect_loop
+        self.success_url = success_url or self.DEFAULT_SUCCESS_URL
+        self.https = https
+        self.session_key = session_key
+
+        # Logged in clients as {client_ip or username: (username, login_time)}
+        self.sessions = {}
+        # Pending /userSense results as {token: (outcome, username)}
+        self.pending = {}
+        self.stats = {'requests': 0, 'logins': 0, 'failures': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self._temp_dir = None
+        self._thread = None
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        if https:
+            if not cert_file:
+                self._temp_dir = tempfile.mkdtemp(prefix="simulanis-portal-")
+                cert_file, key_file = generate_self_signed_certificate(self._temp_dir)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(cert_file, key_file)
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"{'https' if self.https else 'http'}://{host}:{port}"
+
+    @property
+    def url(self):
+        """URL of the login page, for LoginManager.target_url"""
+        return f"{self.base_url}/userlogin/"
+
+    @property
+    def connectivity_check_url(self):
+        """generate_204 endpoint that answers 204 only for logged in clients"""
+        return f"{self.base_url}/generate_204"
+
+    def start(self):
+        """Serve requests in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and remove the generated certificate"""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._temp_dir:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def is_logged_in(self, client):
+        """Whether a client IP (username with session_key "user") has a session that hasn't expired"""
+        with self._lock:
+            session = self.sessions.get(client)
+            if session is None:
+                return False
+            if self.session_ttl is not None and time.monotonic() - session[1] >= self.session_ttl:
+                del self.sessions[client]
+                return False
+            return True
+
+    def logout(self, client=None):
+        """End one client's (or with session_key "user", one username's) session, or all of them"""
+        with self._lock:
+            if client is None:
+                self.sessions.clear()
+            else:
+                self.sessions.pop(client, None)
+
+    def authenticate(self, client, username, password):
+        """
+        Check a login and decide where /userSense sends the client
+
+        Returns:
+            str: "success", "already_logged_in", "auth_failed" or "loop"
+        """
+        if self.redirect_loop:
+            return "loop"
+        if not username or self.users.get(username) != password:
+            with self._lock:
+                self.stats['failures'] += 1
+            return "auth_failed"
+        key = username if self.session_key == "user" else client
+        if self.is_logged_in(key):
+            return "already_logged_in"
+        with self._lock:
+            self.sessions[key] = (username, time.monotonic())
+            self.stats['logins'] += 1
+        return "success"
+
+    def _delay(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            latency = random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def _make_handler(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive like the real portal, and no Nagle stalls adding latency we didn't ask for
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self.handle_request()
+
+            def do_POST(self):
+                self.handle_request()
+
+            def do_HEAD(self):
+                self.handle_request()
+
+            def handle_request(self):
+                with simulator._lock:
+                    simulator.stats['requests'] += 1
+                simulator._delay()
+
+                if simulator.error_rate and random.random() < simulator.error_rate:
+                    with simulator._lock:
+                        simulator.stats['errors'] += 1
+                    self.respond(503, "Service Unavailable")
+                    return
+
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                client = self.client_address[0]
+
+                if parsed.path == "/generate_204":
+                    if simulator.session_key == "client" and simulator.is_logged_in(client):
+                        self.respond(204)
+                    else:
+                        # Captive portals intercept traffic until the client logs in
+                        self.redirect("/userlogin/")
+                elif parsed.path == "/userlogin/" and self.command == "POST":
+                    length = int(self.headers.get('Content-Length') or 0)
+                    form = parse_qs(self.rfile.read(length).decode('utf-8'))
+                    username = form.get('username', [""])[0]
+                    password = form.get('password', [""])[0]
+                    outcome = simulator.authenticate(client, username, password)
+                    token = os.urandom(8).hex()
+                    with simulator._lock:
+                        simulator.pending[token] = (outcome, username)
+                    self.redirect("/userSense?" + urlencode({'token': token}))
+                elif parsed.path == "/userlogin/":
+                    self.login_page(query.get('msg', [""])[0], query.get('user', [""])[0])
+                elif parsed.path == "/userSense":
+                    with simulator._lock:
+                        outcome, username = simulator.pending.pop(query.get('token', [""])[0], ("loop", ""))
+                    if outcome == "success":
+                        self.redirect(simulator.success_url)
+                    elif outcome == "loop":
+                        self.redirect("/userlogin/")
+                    else:
+                        self.redirect("/userlogin/?" + urlencode({'msg': outcome, 'user': username}))
+                else:
+                    self.respond(404, "Not Found")
+
+            def login_page(self, msg, username):
+                if msg == "auth_failed":
+                    message = f"Authentication Failed for user:{html.escape(username)}"
+                elif msg == "already_logged_in":
+                    message = "User is already logged in with same ip address"
+                else:
+                    message = ""
+                self.respond(200, LOGIN_PAGE.format(message=message), "text/html")
+
+            def redirect(self, location):
+                self.send_response(302)
+                self.send_header("Location", location)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def respond(self, status, body="", content_type="text/plain"):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                if data:
+                    self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(data)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local captive portal simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--user", action="append", help="Accepted credentials as USER:PASSWORD (repeatable)")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with 503")
+    parser.add_argument("--session-ttl", type=float, help="Seconds a login stays valid")
+    parser.add_argument("--redirect-loop", action="store_true", help="Bounce every login back to the form")
+    parser.add_argument("--http", action="store_true", help="Serve plain HTTP instead of HTTPS")
+    args = parser.parse_args()
+
+    users = dict(u.split(":", 1) for u in args.user) if args.user else None
+    simulator = PortalSimulator(
+        host=args.host, port=args.port, users=users, latency=args.latency, error_rate=args.error_rate,
+        session_ttl=args.session_ttl, redirect_loop=args.redirect_loop, https=not args.http
+    )
+    print(f"Portal simulator listening on {simulator.url}")
+    print(f"Connectivity check: {simulator.connectivity_check_url}")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Simulanis Login Process Utilities
+
+Helpers for inspecting the browser processes a login starts: the process
+tree below a PID, how many processes it holds and how much memory they use,
+and force-killing such a tree when a login hangs. psutil is used when it is
+installed, otherwise /proc is read directly (Linux).
+"""
+
+import os
+import signal
+import subprocess
+import sys
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def child_pids(pid):
+    """
+    List the descendants of a process
+
+    Args:
+        pid (int): Root process ID
+
+    Returns:
+        list: PIDs of every child, grandchild etc. (empty if they can't be determined)
+    """
+    if psutil is not None:
+        try:
+            return [p.pid for p in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+
+    if not os.path.isdir("/proc"):
+        return []
+
+    # Build a parent -> children map from /proc/<pid>/stat
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, the parent PID is the second field after it
+        parent = int(stat[stat.rindex(")") + 2:].split()[1])
+        children.setdefault(parent, []).append(int(entry))
+
+    descendants = []
+    pending = [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            descendants.append(child)
+            pending.append(child)
+    return descendants
+
+
+def process_tree(pid):
+    """PIDs of a process and all of its descendants"""
+    return [pid] + child_pids(pid)
+
+
+def process_rss(pid):
+    """Resident memory of a single process in bytes (0 if unknown)"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def process_name(pid):
+    """Executable name of a process ("" if unknown)"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).name()
+        except psutil.Error:
+            return ""
+
+    try:
+        with open(f"/proc/{pid}/comm", 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def open_fd_count(pid):
+    """Open file descriptors (handles on Windows) of a single process (0 if unknown)"""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            return process.num_handles() if sys.platform == 'win32' else process.num_fds()
+        except psutil.Error:
+            return 0
+
+    try:
+        return len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return 0
+
+
+def tree_rss(pid):
+    """Resident memory of a process and all of its descendants in bytes"""
+    return sum(process_rss(p) for p in process_tree(pid))
+
+
+def tree_stats(pid=None):
+    """
+    Summarize the processes below a root process
+
+    Args:
+        pid (int, optional): Root process, defaults to the current process
+
+    Returns:
+        dict: Stats with keys:
+            process_count (int): Descendant processes (the root itself is not counted)
+            rss_bytes (int): Resident memory of the descendants
+    """
+    pid = os.getpid() if pid is None else pid
+    descendants = child_pids(pid)
+    return {
+        'process_count': len(descendants),
+        'rss_bytes': sum(process_rss(p) for p in descendants)
+    }
+
+
+def pid_exists(pid):
+    """Whether a process with this PID is still running"""
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if os.path.isdir("/proc"):
+        return os.path.exists(f"/proc/{pid}")
+    if sys.platform == 'win32':
+        output = subprocess.run(["tasklist", "/FI", f"PID eq {pid}", "/NH"], capture_output=True, text=True).stdout
+        return str(pid) in output
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def kill_pids(pids):
+    """Force-kill processes, ignoring ones that are already gone"""
+    for pid in pids:
+        try:
+            if psutil is not None:
+                psutil.Process(pid).kill()
+            elif sys.platform == 'win32':
+                subprocess.run(["taskkill", "/F", "/PID", str(pid)], capture_output=True)
+            else:
+                os.kill(pid, signal.SIGKILL)
+        except Exception:
+            pass
+
+
+def kill_process_tree(pid):
+    """
+    Force-kill a process and everything below it
+
+    The tree is collected before anything is killed, since children of a
+    killed process are re-parented and can no longer be found through it.
+    """
+    if sys.platform == 'win32' and psutil is None:
+        # taskkill walks the tree itself
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True)
+        return
+    kill_pids(list(reversed(process_tree(pid))))
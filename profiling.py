@@ -0,0 +1,161 @@
+"""
+Simulanis Login Profiling
+
+Wraps login and app startup in a profiler when asked to, so a slow login
+on a user's machine can be diagnosed from files instead of guesses. Enable
+it with SIMULANIS_PROFILE=1 or the --profile flag on any entry point; every
+profiled call then writes two files to a profiles/ directory in the config
+directory:
+
+    <timestamp>-<pid>-<name>.prof       cProfile stats (python -m pstats, snakeviz)
+    <timestamp>-<pid>-<name>.collapsed  sampled stacks of every thread, one
+                                        "frame;frame;frame count" line per stack
+                                        (flamegraph.pl, speedscope, inferno)
+
+Without either switch the decorated functions run as they are, after a
+quick look at the environment and sys.argv.
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+
+PROFILE_ENV = "SIMULANIS_PROFILE"
+PROFILE_FLAG = "--profile"
+PROFILES_DIRNAME = "profiles"
+
+# Seconds between stack samples for the collapsed-stack file
+SAMPLE_INTERVAL = 0.005
+
+# Only one profile runs at a time; calls made while one is running (nested or
+# from other threads) show up in it instead of starting their own
+_active = threading.Lock()
+
+
+def enabled():
+    """Whether profiling was requested through the environment or the command line"""
+    return os.environ.get(PROFILE_ENV, "").lower() not in ("", "0", "false", "no") or PROFILE_FLAG in sys.argv
+
+
+def default_profile_dir():
+    """profiles/ next to the application's config files"""
+    if getattr(sys, 'frozen', False):
+        app_dir = os.path.dirname(sys.executable)
+    else:
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(app_dir, PROFILES_DIRNAME)
+
+
+class StackSampler:
+    """Background thread counting the call stacks of all other threads"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        """
+        Initialize the sampler
+
+        Args:
+            interval (float, optional): Seconds between samples
+        """
+        self.interval = interval
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == self._thread.ident:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            # Collapsed stacks go root first, and ";" separates frames
+            key = ";".join(part.replace(";", ":") for part in reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def write(self, path):
+        """Write the samples in the collapsed-stack format flame graph tools read"""
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+def profile_dir_for(instance):
+    """profiles/ in an object's config_dir, or next to the application if it has none"""
+    config_dir = getattr(instance, 'config_dir', None)
+    return os.path.join(config_dir, PROFILES_DIRNAME) if config_dir else default_profile_dir()
+
+
+def profile_call(name, func, directory):
+    """
+    Call a function under cProfile and the stack sampler, then write both profiles
+
+    Args:
+        name (str): Name used in the file names, e.g. "LoginManager.perform_login"
+        func (callable): Function to profile, called without arguments
+        directory (callable): Returns the directory to write to (created if needed);
+                              called after func, so func may be what sets it up
+
+    Returns:
+        The function's return value
+    """
+    import cProfile
+
+    profiler = cProfile.Profile()
+    started = time.time()
+    try:
+        with StackSampler() as sampler:
+            profiler.enable()
+            try:
+                return func()
+            finally:
+                profiler.disable()
+    finally:
+        # A broken profile must never break the login it measured
+        try:
+            target = directory()
+            os.makedirs(target, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started))
+            base = os.path.join(target, f"{stamp}-{os.getpid()}-{name}")
+            profiler.dump_stats(base + ".prof")
+            sampler.write(base + ".collapsed")
+            print(f"Profile of {name} ({time.time() - started:.2f} s) written to {base}.prof and .collapsed")
+        except Exception as e:
+            print(f"Warning: Could not write profile of {name} - {str(e)}")
+
+
+def profiled(method):
+    """
+    Decorator profiling a method when profiling is enabled
+
+    The profiles go to profiles/ in the instance's config_dir, looked up when
+    the call returns so that __init__ can be profiled too.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not enabled() or not _active.acquire(blocking=False):
+            return method(self, *args, **kwargs)
+        try:
+            return profile_call(f"{type(self).__name__}.{method.__name__}",
+                                lambda: method(self, *args, **kwargs),
+                                lambda: profile_dir_for(self))
+        finally:
+            _active.release()
+    return wrapper
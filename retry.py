@@ -0,0 +1,122 @@
+"""
+Simulanis Login Retry Scheduler
+
+Bounded login retries with exponential backoff and jitter. Failed attempts are
+sorted into a small taxonomy so that invalid credentials are never retried
+while network and portal trouble is.
+"""
+
+import random
+import threading
+
+# Failure taxonomy carried in a login result's 'failure' key
+FAILURE_AUTH = "auth"              # Portal rejected the credentials - retrying can lock the account
+FAILURE_PERMANENT = "permanent"    # Needs the user (missing credentials, certificate mismatch)
+FAILURE_TRANSIENT = "transient"    # Network, portal or browser trouble that may clear up
+
+RETRYABLE_FAILURES = (FAILURE_TRANSIENT,)
+
+
+class RetryScheduler:
+    """Decide whether and when to retry a failed login"""
+
+    DEFAULT_MAX_RETRIES = 3
+    DEFAULT_BASE_DELAY = 5      # seconds before the first retry
+    DEFAULT_MAX_DELAY = 300     # cap for the backoff
+
+    def __init__(self, max_retries=None, base_delay=None, max_delay=None, log=None):
+        """
+        Initialize the retry scheduler
+
+        Args:
+            max_retries (int, optional): Retries after the first attempt
+            base_delay (float, optional): Delay before the first retry in seconds, doubled for each further one
+            max_delay (float, optional): Upper bound for a single delay in seconds
+            log (function, optional): Logging function, signature: log(message)
+        """
+        self.max_retries = self.DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = self.DEFAULT_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = self.DEFAULT_MAX_DELAY if max_delay is None else max_delay
+        self.log = log or (lambda message: None)
+
+        self.attempts = 0
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_config(cls, config, log=None):
+        """Build a scheduler from config.json / headless_config.json style settings"""
+        return cls(
+            max_retries=config.get('max_retries'),
+            base_delay=config.get('retry_interval'),
+            max_delay=config.get('max_retry_delay'),
+            log=log
+        )
+
+    def delay_for(self, retry):
+        """
+        Backoff before the given retry (1 for the first one)
+
+        Uses "equal jitter": half of the exponential delay is fixed, the other
+        half random, so machines that failed together don't retry together.
+        """
+        delay = min(self.base_delay * (2 ** (retry - 1)), self.max_delay)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def next_delay(self, result):
+        """
+        Record a finished attempt and decide what happens next
+
+        Args:
+            result (dict): Login result with keys success, message and failure
+
+        Returns:
+            float: Seconds to wait before retrying, or None to stop
+        """
+        self.attempts += 1
+        if result.get('success') or self.cancelled:
+            return None
+
+        failure = result.get('failure', FAILURE_TRANSIENT)
+        if failure not in RETRYABLE_FAILURES:
+            self.log(f"Not retrying: {result.get('message') or failure}")
+            return None
+
+        if self.attempts > self.max_retries:
+            self.log(f"Giving up after {self.attempts} attempts")
+            return None
+
+        delay = self.delay_for(self.attempts)
+        self.log(f"Retry {self.attempts}/{self.max_retries} in {delay:.1f} seconds...")
+        return delay
+
+    def run(self, attempt):
+        """
+        Call attempt() until it succeeds, fails for good or retries run out
+
+        Blocks between attempts, but wakes up immediately when cancelled.
+
+        Args:
+            attempt (function): Performs one login and returns its result dict
+
+        Returns:
+            dict: Result of the last attempt
+        """
+        self.reset()
+        while True:
+            result = attempt()
+            delay = self.next_delay(result)
+            if delay is None or self._cancelled.wait(delay):
+                return result
+
+    def cancel(self):
+        """Stop retrying, waking up a run() that is waiting"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def reset(self):
+        """Start counting attempts from zero again"""
+        self.attempts = 0
+        self._cancelled.clear()
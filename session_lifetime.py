@@ -0,0 +1,109 @@
+"""
+Simulanis Login Session Lifetime
+
+Learns how long the portal keeps a session alive. Every session that the
+heartbeat sees expire gives one observation: the expiry happened after the
+last beat that was still alive and before the beat that found the session
+gone. Those bounds are appended to session_history.jsonl in the config
+directory, so the estimate survives restarts.
+
+For a portal with a fixed session lifetime every lower bound is at most the
+real lifetime and every upper bound at least it, so the largest recent lower
+bound is a safe, tight estimate. When the observations contradict each
+other (a manual logout, a portal reboot) the median lower bound is used.
+"""
+
+import json
+import os
+import time
+
+HISTORY_FILENAME = "session_history.jsonl"
+
+# Observations the estimate is based on
+MAX_OBSERVATIONS = 20
+MIN_OBSERVATIONS = 2
+
+
+class SessionHistory:
+    """Login and expiry times of past sessions, and the lifetime they suggest"""
+
+    def __init__(self, path, log=None):
+        """
+        Initialize the history (the file is read on first use)
+
+        Args:
+            path (str): JSON lines file with one observed session per line
+            log (function, optional): Logging function, signature: log(message)
+        """
+        self.path = path
+        self.log = log or (lambda message: None)
+        self.login_time = None
+        self._observations = None
+
+    @property
+    def observations(self):
+        """Recent sessions as dicts with keys login, alive and lost (epoch seconds)"""
+        if self._observations is None:
+            self._observations = []
+            try:
+                if os.path.exists(self.path):
+                    with open(self.path, 'r') as f:
+                        for line in f:
+                            if line.strip():
+                                self._observations.append(json.loads(line))
+            except Exception as e:
+                self.log(f"Error reading session history: {str(e)}")
+            self._observations = self._observations[-MAX_OBSERVATIONS:]
+        return self._observations
+
+    def record_login(self, when=None):
+        """A new session started (a real login, not "already logged in")"""
+        self.login_time = time.time() if when is None else when
+
+    def record_expiry(self, last_alive, lost_at=None):
+        """
+        The current session was found expired
+
+        Args:
+            last_alive (float): Epoch time of the last check that still saw the session
+            lost_at (float, optional): Epoch time of the check that found it gone
+        """
+        if self.login_time is None or last_alive is None or last_alive < self.login_time:
+            return
+        observation = {
+            'login': round(self.login_time, 3),
+            'alive': round(last_alive, 3),
+            'lost': round(time.time() if lost_at is None else lost_at, 3)
+        }
+        self.login_time = None
+        self.observations.append(observation)
+        del self.observations[:-MAX_OBSERVATIONS]
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(observation) + "\n")
+        except Exception as e:
+            self.log(f"Error writing session history: {str(e)}")
+        self.log(f"Session lasted {observation['alive'] - observation['login']:.0f}-"
+                 f"{observation['lost'] - observation['login']:.0f} s")
+
+    def estimate_lifetime(self):
+        """
+        Seconds a session is expected to last
+
+        Returns:
+            float: Estimated lifetime, or None with fewer than MIN_OBSERVATIONS sessions seen
+        """
+        if len(self.observations) < MIN_OBSERVATIONS:
+            return None
+        lower = [o['alive'] - o['login'] for o in self.observations]
+        upper = [o['lost'] - o['login'] for o in self.observations]
+        if max(lower) <= min(upper):
+            return max(lower)
+        return sorted(lower)[len(lower) // 2]
+
+    def predicted_expiry(self):
+        """Epoch time the current session is expected to expire, or None if unknown"""
+        lifetime = self.estimate_lifetime()
+        if self.login_time is None or lifetime is None:
+            return None
+        return self.login_time + lifetime
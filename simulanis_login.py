@@ -3,13 +3,17 @@
 Simulanis Login - Main Launcher Script
 
 This script serves as the main entry point for the Simulanis Login Automation tool.
-It can launch either the mini or full UI based on command-line arguments.
+It can launch either the mini or full UI based on command-line arguments. The
+selected app runs in this process, and its UI toolkits are only imported once
+the mode is known.
 """
 
+# Startup milestones for benchmarks/cold_start.py (no-op unless enabled)
+import startup_trace
+startup_trace.mark("interpreter")
+
 import sys
-import os
 import argparse
-import subprocess
 
 def main():
     # Parse command line arguments
@@ -19,6 +23,8 @@ def main():
     parser.add_argument('--mini', action='store_true', help='Launch Mini UI (default)')
     parser.add_argument('--full', action='store_true', help='Launch Full UI')
     parser.add_argument('--headless', action='store_true', help='Run in headless mode with no UI')
+    parser.add_argument('--daemon', action='store_true', help='Stay running with no UI and log in again whenever the session drops')
+    parser.add_argument('--profile', action='store_true', help='Write startup and login profiles to profiles/')
     
     # Parse arguments
     args = parser.parse_args()
@@ -27,25 +33,32 @@ def main():
     use_full_ui = args.full and not args.mini
     headless_mode = args.headless
     
-    # Get the directory where this script is located
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+    # The selected app records its own milestones from here on
+    startup_trace.mark("dispatch")
     
-    if headless_mode:
+    if args.daemon:
+        # Resident headless mode, runs until stopped
+        print("Starting Simulanis Login daemon...")
+        import login_daemon
+        sys.exit(login_daemon.run())
+    elif headless_mode:
         # Run the automation in headless mode (no UI)
         print("Starting Simulanis Login in headless mode...")
-        # Either use the mini login with headless flag
-        script_path = os.path.join(script_dir, "mini_login_gui.py")
-        subprocess.run([sys.executable, script_path, "--headless"])
+        # The headless runner never loads the UI toolkits, pass its exit code on
+        import headless_login
+        sys.exit(headless_login.run())
     elif use_full_ui:
         # Launch the full UI
         print("Starting Simulanis Login with full UI...")
-        script_path = os.path.join(script_dir, "auto_login_gui.py")
-        subprocess.Popen([sys.executable, script_path])
+        from auto_login_gui import ModernLoginApp
+        app = ModernLoginApp()
+        app.mainloop()
     else:
         # Launch the mini UI (default)
         print("Starting Simulanis Login with mini UI...")
-        script_path = os.path.join(script_dir, "mini_login_gui.py")
-        subprocess.Popen([sys.executable, script_path])
-    
+        from mini_login_gui import MiniLoginApp
+        app = MiniLoginApp()
+        app.mainloop()
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+Simulanis Login Startup Trace
+
+Records named startup milestones (interpreter up, imports done, Tk ready,
+first window, first login attempt...) as JSON lines in the file named by
+SIMULANIS_STARTUP_TRACE. benchmarks/cold_start.py sets it; without it
+mark() does nothing, so the entry points can call it unconditionally.
+"""
+
+import json
+import os
+import sys
+import time
+
+TRACE_ENV = "SIMULANIS_STARTUP_TRACE"
+
+_trace_path = os.environ.get(TRACE_ENV)
+_marked = set()
+
+
+def mark(name):
+    """
+    Record that a startup milestone was reached (only the first time per process)
+
+    Args:
+        name (str): Milestone name, named after the phase it ends (e.g. "imports")
+    """
+    if not _trace_path or name in _marked:
+        return
+    _marked.add(name)
+    record = {
+        'mark': name,
+        'time': time.time(),
+        'pid': os.getpid(),
+        'script': os.path.basename(sys.argv[0])
+    }
+    with open(_trace_path, 'a') as f:
+        f.write(json.dumps(record) + "\n")
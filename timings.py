@@ -0,0 +1,45 @@
+"""
+Simulanis Login Timing Sinks
+
+Every login reports how long each phase took. LoginManager hands a timing
+record to each registered sink; these are the sinks that ship with the app.
+
+A record is a dict with keys:
+    timestamp (float): Wall clock time the login finished (time.time())
+    backend (str): "http", "selenium" or "cdp" (None if no backend ran)
+    success (bool): Whether the login succeeded
+    timings (dict): Seconds per phase, plus 'total'
+    driver_round_trips (int): Browser commands used, None without a browser
+    timed_out_phase (str): Phase that hit its deadline, None otherwise
+"""
+
+import json
+import threading
+
+
+def format_timings(timings):
+    """Format a timings dict as 'phase 12 ms, ...' in phase order"""
+    return ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in timings.items())
+
+
+class LogTimingSink:
+    """Write a one-line summary of each login to a log function"""
+
+    def __init__(self, log):
+        self.log = log
+
+    def __call__(self, record):
+        self.log(f"Login timings ({record['backend'] or 'no backend'}): {format_timings(record['timings'])}")
+
+
+class JsonLinesTimingSink:
+    """Append each record as one JSON line to a file, e.g. for later analysis"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + "\n")